@@ -1,9 +1,5 @@
 #!/usr/bin/env python3
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(__file__))
-
 import random
 from src.config import GameConfig, RewardConfig
 from src.game_engine import GameEngine
@@ -37,7 +33,7 @@ def main():
     
     while not done and step_count < 20:
         print(f"Step {step_count + 1}:")
-        obs = engine.get_observation()
+        obs = engine.obs
         print(f"Timestep: {obs['timestep']}, Score: {obs['score']}")
         print(f"Stations: {len(engine.state.stations)}, Lines: {len(obs['lines'])}")
         
@@ -62,7 +58,7 @@ def main():
         
         step_count += 1
     
-    final_obs = engine.get_observation()
+    final_obs = engine.obs
     
     print("\n=== Game Complete ===")
     print(f"Final score: {final_obs['score']}")
@@ -70,8 +66,8 @@ def main():
     print(f"Game over: {final_obs['game_over']}")
     print(f"Lines built: {len(final_obs['lines'])}")
     
-    if final_obs['passengers']:
-        total_waiting = sum(sum(p.values()) for p in final_obs['passengers'].values())
+    if len(final_obs['passengers']):
+        total_waiting = int(final_obs['passengers'].sum())
         print(f"Passengers still waiting: {total_waiting}")
 
 
@@ -4,11 +4,8 @@ Demonstration of MinimetroRL gymnasium environment usage.
 """
 
 import numpy as np
+import random
 import sys
-import os
-
-# Add the current directory to the path for imports
-sys.path.insert(0, os.path.dirname(__file__))
 
 from src.gym_env import MinimetroGymEnv
 from src.config import GameConfig, RewardConfig
@@ -31,6 +28,7 @@ class SimpleHeuristicAgent:
     def __init__(self, action_space, env):
         self.action_space = action_space
         self.env = env
+        self._rng = random.Random()
     
     def act(self, observation):
         """Choose an action using simple heuristics."""
@@ -42,32 +40,13 @@ class SimpleHeuristicAgent:
         
         if non_none_actions:
             # Choose randomly among valid non-none actions
-            chosen_action_dict = np.random.choice(non_none_actions)
+            chosen_action_dict = self._rng.choice(non_none_actions)
             
             # Find the corresponding discrete action
-            for action_idx, action_dict in self.env._action_map.items():
-                if self._actions_match(action_dict, chosen_action_dict):
-                    return action_idx
+            return self.env.action_index(chosen_action_dict)
         
         # Fall back to random action if no valid actions found
         return 0  # 'none' action
-    
-    def _actions_match(self, action1, action2):
-        """Check if two action dictionaries match."""
-        if action1['action'] != action2['action']:
-            return False
-        
-        # Check specific parameters for each action type
-        if action1['action'] == 'create_line':
-            return (action1.get('from') == action2.get('from') and
-                    action1.get('to') == action2.get('to'))
-        elif action1['action'] == 'extend_line':
-            return (action1.get('line_id') == action2.get('line_id') and
-                    action1.get('to') == action2.get('to'))
-        elif action1['action'] == 'remove_line':
-            return action1.get('line_id') == action2.get('line_id')
-        
-        return True
 
 
 def run_episode(env, agent, render=False, max_steps=1000):
@@ -1,32 +1,101 @@
 #!/usr/bin/env python3
 
 import pygame
+import os
+import sys
 import random
+import numpy as np
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, Any, Tuple, Optional, List
-from enum import Enum
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for src
+from src.kernels import njit
+from src.types import _SLOTS
 
-class StationType(Enum):
-    CIRCLE = 'circle'
-    SQUARE = 'square'
-    TRIANGLE = 'triangle'
 
+# Tile codes stored in the numpy grid; plain ints are cheaper to compare than Enum members
+EMPTY, CIRCLE, SQUARE, TRIANGLE = 0, 1, 2, 3
+MAX_STATIONS = 10
+TILE_NAMES = ['empty', 'circle', 'square', 'triangle']
 
-class TileType(Enum):
-    EMPTY = 'empty'
-    CIRCLE = 'circle'
-    SQUARE = 'square'
-    TRIANGLE = 'triangle'
 
+@njit(cache=True)
+def find_empty_indices(grid):
+    out = np.empty(grid.size, np.int32)
+    k = 0
+    for y in range(grid.shape[0]):
+        for x in range(grid.shape[1]):
+            if grid[y, x] == EMPTY:
+                out[k] = y * grid.shape[1] + x
+                k += 1
+    return out[:k]
 
-@dataclass
-class Position:
-    x: int
-    y: int
+
+@njit("Tuple((int64, boolean, int64, int64, int64))("
+      "int8[:, :], int32[:], int64, int16[:, :], int16[:, :], int16[:], int64, "
+      "int64, int64, int64, float64, int64, int16[:], "
+      "int64, int8[:], int8[:], int8[:, :], boolean[:], int8[:], int8[:, :], int8[:])",
+      cache=True)
+def step_world(grid, free_cells, n_free, station_positions, passenger_counts,
+               passenger_total, n_stations, timestep, station_spawn_rate,
+               passenger_spawn_rate, cell_draw, station_type, spawn_passengers,
+               n_lines, train_track, train_load, train_types, train_at_start,
+               new_loads, new_train_types, new_types):
+    """Numeric part of one demo tick, on arrays only so it compiles in nopython mode.
+    
+    Spawns a station on a free cell, moves the trains, adds passengers and
+    applies the time penalty and the overflow check. Returns
+    (score_delta, game_over, passengers_added, n_free, n_stations).
+    """
+    added = 0
+    
+    # Spawn a station: swap-pop a random entry of the free-cell array, which
+    # removes it in O(1) without rescanning the grid
+    if timestep % station_spawn_rate == 0 and n_stations < MAX_STATIONS and n_free > 0:
+        i = min(int(cell_draw * n_free), n_free - 1)
+        n_free -= 1
+        cell = free_cells[i]
+        free_cells[i] = free_cells[n_free]
+        x = cell % grid.shape[1]
+        y = cell // grid.shape[1]
+        station_positions[n_stations, 0] = x
+        station_positions[n_stations, 1] = y
+        grid[y, x] = station_type
+        total = 0
+        for t in range(3):
+            passenger_counts[n_stations, t] = spawn_passengers[t]
+            total += spawn_passengers[t]
+        passenger_total[n_stations] = total
+        added += total
+        n_stations += 1
+    
+    # Move trains: every two-stop line puts its train at one end with a fresh load
+    for i in range(n_lines):
+        train_track[i] = 0 if train_at_start[i] else 1
+        train_load[i] = new_loads[i]
+        for t in range(train_types.shape[1]):
+            train_types[i, t] = new_train_types[i, t]
+    
+    if timestep % passenger_spawn_rate == 0:
+        for idx in range(n_stations):
+            passenger_type = new_types[idx]
+            if passenger_counts[idx, passenger_type] < 5:
+                passenger_counts[idx, passenger_type] += 1
+                passenger_total[idx] += 1
+                added += 1
+    
+    score_delta = -1  # Time penalty
+    game_over = False
+    for idx in range(n_stations):
+        if passenger_total[idx] >= 10:
+            game_over = True
+    if game_over:
+        score_delta -= 100
+    return score_delta, game_over, added, n_free, n_stations
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GameConfig:
     grid_size: int = 8
     max_lines: int = 3
@@ -34,6 +103,7 @@ class GameConfig:
     passenger_spawn_rate: int = 15
     max_timesteps: int = 500
     fps: int = 10
+    render_every: int = 1  # 0 disables rendering entirely (headless)
 
 
 class PygameRenderer:
@@ -62,18 +132,43 @@ class PygameRenderer:
         self.font = pygame.font.Font(None, 28)
         self.small_font = pygame.font.Font(None, 20)
         self.clock = pygame.time.Clock()
+        # Rendered HUD text keyed by (string, font), least recently used evicted first
+        self._text_cache: 'OrderedDict[Tuple[str, pygame.font.Font], pygame.Surface]' = OrderedDict()
+        self._text_cache_size = 256
+        
+        # The grid never changes, so rasterize it once and blit it every frame
+        self._background = pygame.Surface((self.window_width, self.window_height)).convert()
+        self._background.fill(self.colors['background'])
+        self._draw_grid(self._background)
+        
+        # Station shapes and the passenger badge are baked into sprites once
+        self._station_sprites = {
+            name: self._make_station_sprite(name) for name in TILE_NAMES[1:]
+        }
+        self._station_sprite_by_code = [None] + [self._station_sprites[name] for name in TILE_NAMES[1:]]
+        self._badge_sprite = self._make_badge_sprite(12)
+        
+        # Screen coordinates of every cell center, indexed [x][y]
+        half = self.cell_size // 2
+        self._screen_xy = [
+            [(x * self.cell_size + half, y * self.cell_size + half)
+             for y in range(self.config.grid_size)]
+            for x in range(self.config.grid_size)
+        ]
     
     def render(self, observation: Dict[str, Any]) -> bool:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        # Pump once, then only pull the event types we act on; everything
+        # else (mouse motion etc.) is dropped without building event objects
+        pygame.event.pump()
+        events = pygame.event.get((pygame.QUIT, pygame.KEYDOWN), pump=False)
+        pygame.event.clear(pump=False)
+        for event in events:
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and
+                                             event.key == pygame.K_ESCAPE):
                 return False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return False
         
-        self.screen.fill(self.colors['background'])
+        self.screen.blit(self._background, (0, 0))
         
-        self._draw_grid()
         self._draw_stations(observation)
         self._draw_lines(observation)
         self._draw_trains(observation)
@@ -84,67 +179,74 @@ class PygameRenderer:
         self.clock.tick(self.config.fps)
         return True
     
-    def _draw_grid(self):
-        # Draw grid lines
-        for x in range(self.config.grid_size + 1):
-            pygame.draw.line(self.screen, self.colors['grid_line'],
-                           (x * self.cell_size, 0),
-                           (x * self.cell_size, self.config.grid_size * self.cell_size))
+    def _draw_grid(self, surface: pygame.Surface):
+        cs = self.cell_size
+        gs = self.config.grid_size
+        draw_line = pygame.draw.line
+        grid_line = self.colors['grid_line']
+        
+        # Fill the whole board once; the grid lines drawn on top separate the cells
+        surface.fill(self.colors['empty'], pygame.Rect(0, 0, gs * cs, gs * cs))
         
-        for y in range(self.config.grid_size + 1):
-            pygame.draw.line(self.screen, self.colors['grid_line'],
-                           (0, y * self.cell_size),
-                           (self.config.grid_size * self.cell_size, y * self.cell_size))
+        # Draw grid lines
+        for x in range(gs + 1):
+            draw_line(surface, grid_line, (x * cs, 0), (x * cs, gs * cs))
         
-        # Fill cells with background
-        for x in range(self.config.grid_size):
-            for y in range(self.config.grid_size):
-                cell_rect = pygame.Rect(x * self.cell_size + 1, y * self.cell_size + 1,
-                                      self.cell_size - 2, self.cell_size - 2)
-                pygame.draw.rect(self.screen, self.colors['empty'], cell_rect)
+        for y in range(gs + 1):
+            draw_line(surface, grid_line, (0, y * cs), (gs * cs, y * cs))
     
     def _draw_stations(self, observation: Dict[str, Any]):
-        grid = observation['grid']
-        for y in range(len(grid)):
-            for x in range(len(grid[y])):
-                if grid[y][x] != 'empty':
-                    self._draw_station(x, y, grid[y][x])
+        cs = self.cell_size
+        blit = self.screen.blit
+        sprites = self._station_sprite_by_code
+        grid = np.asarray(observation['grid'])
+        ys, xs = np.nonzero(grid != EMPTY)
+        for x, y, tile in zip(xs.tolist(), ys.tolist(), grid[ys, xs].tolist()):
+            blit(sprites[tile], (x * cs, y * cs))
     
-    def _draw_station(self, x: int, y: int, station_type: str):
-        center_x = x * self.cell_size + self.cell_size // 2
-        center_y = y * self.cell_size + self.cell_size // 2
+    def _make_station_sprite(self, station_type: str) -> pygame.Surface:
+        sprite = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA).convert_alpha()
+        center_x = self.cell_size // 2
+        center_y = self.cell_size // 2
         size = self.cell_size // 3
         
         color = self.colors.get(station_type, self.colors['empty'])
         
         if station_type == 'circle':
-            pygame.draw.circle(self.screen, color, (center_x, center_y), size)
-            pygame.draw.circle(self.screen, (0, 0, 0), (center_x, center_y), size, 3)
+            pygame.draw.circle(sprite, color, (center_x, center_y), size)
+            pygame.draw.circle(sprite, (0, 0, 0), (center_x, center_y), size, 3)
         elif station_type == 'square':
             rect = pygame.Rect(center_x - size, center_y - size, size * 2, size * 2)
-            pygame.draw.rect(self.screen, color, rect)
-            pygame.draw.rect(self.screen, (0, 0, 0), rect, 3)
+            pygame.draw.rect(sprite, color, rect)
+            pygame.draw.rect(sprite, (0, 0, 0), rect, 3)
         elif station_type == 'triangle':
             points = [
                 (center_x, center_y - size),
                 (center_x - size, center_y + size),
                 (center_x + size, center_y + size)
             ]
-            pygame.draw.polygon(self.screen, color, points)
-            pygame.draw.polygon(self.screen, (0, 0, 0), points, 3)
+            pygame.draw.polygon(sprite, color, points)
+            pygame.draw.polygon(sprite, (0, 0, 0), points, 3)
+        return sprite
+    
+    def _make_badge_sprite(self, radius: int) -> pygame.Surface:
+        sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(sprite, (255, 255, 255), (radius, radius), radius)
+        pygame.draw.circle(sprite, (0, 0, 0), (radius, radius), radius, 2)
+        return sprite
     
     def _draw_lines(self, observation: Dict[str, Any]):
+        screen = self.screen
+        screen_xy = self._screen_xy
+        draw_lines = pygame.draw.lines
         for i, line_data in enumerate(observation['lines']):
             tracks = line_data['tracks']
             if len(tracks) < 2:
                 continue
             
             color = self._get_line_color(i)
-            
-            for j in range(len(tracks) - 1):
-                start_pos = self._grid_to_screen(tracks[j])
-                end_pos = self._grid_to_screen(tracks[j + 1])
-                pygame.draw.line(self.screen, color, start_pos, end_pos, 6)
+            points = [screen_xy[x][y] for x, y in tracks]
+            draw_lines(screen, color, False, points, 6)
     
     def _draw_trains(self, observation: Dict[str, Any]):
         for line_data in observation['lines']:
@@ -161,72 +263,75 @@ class PygameRenderer:
                     self.screen.blit(text, text_rect)
     
     def _draw_passengers(self, observation: Dict[str, Any]):
+        # passengers is (n_stations, 3) counts, row-aligned with station_positions
         passengers = observation['passengers']
-        for pos_tuple, passenger_dict in passengers.items():
-            x, y = pos_tuple
+        totals = passengers.sum(axis=1).tolist()
+        for (x, y), counts, total_passengers in zip(observation['station_positions'].tolist(),
+                                                    passengers.tolist(), totals):
             center_x = x * self.cell_size + self.cell_size // 2
             center_y = y * self.cell_size + self.cell_size // 2
             
-            total_passengers = sum(passenger_dict.values())
             if total_passengers > 0:
                 # Draw passenger count
                 text = self.small_font.render(str(total_passengers), True, self.colors['text'])
                 text_rect = text.get_rect(center=(center_x, center_y + 32))
                 
                 # Draw background circle for better visibility
-                pygame.draw.circle(self.screen, (255, 255, 255), text_rect.center, 12)
-                pygame.draw.circle(self.screen, (0, 0, 0), text_rect.center, 12, 2)
+                self.screen.blit(self._badge_sprite,
+                                 self._badge_sprite.get_rect(center=text_rect.center))
                 
                 self.screen.blit(text, text_rect)
                 
                 # Draw small colored dots for passenger types
                 offset = 0
-                for passenger_type, count in passenger_dict.items():
+                for passenger_type, count in zip(TILE_NAMES[1:], counts):
                     if count > 0:
                         color = self.colors.get(passenger_type, self.colors['passenger'])
                         dot_pos = (center_x - 15 + offset * 8, center_y + 15)
                         pygame.draw.circle(self.screen, color, dot_pos, 3)
                         offset += 1
     
+    def _text(self, text: str, font: Optional[pygame.font.Font] = None) -> pygame.Surface:
+        """Render HUD text, reusing the surface while the string is unchanged."""
+        font = font or self.font
+        key = (text, font)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            # Counters change every frame, so keep the cache bounded; the static
+            # labels stay recently used and are never the ones evicted
+            surface = font.render(text, True, self.colors['text']).convert_alpha()
+            self._text_cache[key] = surface
+            if len(self._text_cache) > self._text_cache_size:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return surface
+    
     def _draw_info(self, observation: Dict[str, Any]):
         info_y = self.config.grid_size * self.cell_size + 10
+        blit = self.screen.blit
         
         # Main info
-        timestep_text = f"Timestep: {observation['timestep']}"
-        score_text = f"Score: {observation['score']}"
-        game_over_text = f"Game Over: {observation['game_over']}"
-        
-        timestep_surface = self.font.render(timestep_text, True, self.colors['text'])
-        score_surface = self.font.render(score_text, True, self.colors['text'])
-        game_over_surface = self.font.render(game_over_text, True, self.colors['text'])
-        
-        self.screen.blit(timestep_surface, (10, info_y))
-        self.screen.blit(score_surface, (10, info_y + 30))
-        self.screen.blit(game_over_surface, (10, info_y + 60))
+        blit(self._text(f"Timestep: {observation['timestep']}"), (10, info_y))
+        blit(self._text(f"Score: {observation['score']}"), (10, info_y + 30))
+        blit(self._text(f"Game Over: {observation['game_over']}"), (10, info_y + 60))
         
         # Line info
-        lines_text = f"Lines: {len(observation['lines'])}/{self.config.max_lines}"
-        lines_surface = self.font.render(lines_text, True, self.colors['text'])
-        self.screen.blit(lines_surface, (200, info_y))
+        blit(self._text(f"Lines: {len(observation['lines'])}/{self.config.max_lines}"), (200, info_y))
         
         # Passenger info
-        total_waiting = 0
-        if observation['passengers']:
-            total_waiting = sum(sum(p.values()) for p in observation['passengers'].values())
+        total_waiting = observation.get('total_waiting')
+        if total_waiting is None:
+            total_waiting = int(observation['passengers'].sum())
         
-        passengers_text = f"Waiting: {total_waiting}"
-        passengers_surface = self.font.render(passengers_text, True, self.colors['text'])
-        self.screen.blit(passengers_surface, (200, info_y + 30))
+        blit(self._text(f"Waiting: {total_waiting}"), (200, info_y + 30))
         
         # Instructions
-        instructions = "Press ESC to quit"
-        instructions_surface = self.small_font.render(instructions, True, self.colors['text'])
-        self.screen.blit(instructions_surface, (10, info_y + 90))
+        blit(self._text("Press ESC to quit", self.small_font), (10, info_y + 90))
     
     def _grid_to_screen(self, pos: Tuple[int, int]) -> Tuple[int, int]:
         x, y = pos
-        return (x * self.cell_size + self.cell_size // 2,
-                y * self.cell_size + self.cell_size // 2)
+        return self._screen_xy[x][y]
     
     def _get_line_color(self, line_id: int) -> Tuple[int, int, int]:
         colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255)]
@@ -243,133 +348,132 @@ def main():
     print()
     
     config = GameConfig()
-    renderer = PygameRenderer(config)
+    renderer = PygameRenderer(config) if config.render_every else None
     
     # Initialize game state
-    grid = [[TileType.EMPTY for _ in range(config.grid_size)] 
-            for _ in range(config.grid_size)]
-    stations = []
-    lines = []
+    grid = np.zeros((config.grid_size, config.grid_size), dtype=np.int8)
+    # Flat indices of free cells; the first n_free entries are still free, so
+    # spawning never has to rescan the grid
+    free_cells = find_empty_indices(grid)
+    n_free = len(free_cells)
+    # Waiting passengers per station (rows) and destination type (columns),
+    # plus a running per-station total used for the overflow check
+    passenger_counts = np.zeros((MAX_STATIONS, 3), dtype=np.int16)
+    passenger_total = np.zeros(MAX_STATIONS, dtype=np.int16)
+    station_positions = np.zeros((MAX_STATIONS, 2), dtype=np.int16)
+    n_stations = 0
+    # Each demo line is a straight link between two stations: line_ends[i] holds
+    # their positions and the train sits at end train_track[i]
+    line_ends = np.zeros((config.max_lines, 2, 2), dtype=np.int16)
+    train_track = np.zeros(config.max_lines, dtype=np.int8)
+    train_load = np.zeros(config.max_lines, dtype=np.int8)
+    train_types = np.zeros((config.max_lines, 3), dtype=np.int8)
+    n_lines = 0
+    total_waiting = 0
     timestep = 0
+    
+    # Pre-roll every per-frame random draw in a few vectorized calls instead
+    # of calling into the random module inside the loop
+    rng = np.random.default_rng()
+    steps = config.max_timesteps
+    spawn_cell_draws = rng.random(steps)
+    spawn_station_types = rng.integers(CIRCLE, TRIANGLE + 1, steps)
+    spawn_passengers = rng.integers(0, 3, (steps, 3), dtype=np.int16)
+    new_passenger_types = rng.integers(0, 3, (steps, MAX_STATIONS), dtype=np.int8)
+    train_at_start = rng.random((steps, config.max_lines)) < 0.5
+    train_loads = rng.integers(0, 4, (steps, config.max_lines), dtype=np.int8)
+    train_passenger_types = rng.integers(1, 4, (steps, config.max_lines, 3), dtype=np.int8)
     score = 0
     game_over = False
     
+    # Observation containers are allocated once and refreshed in place each frame;
+    # the renderer reads the numpy grid and passenger matrices directly
+    lines_obs = []
+    observation = {
+        'grid': grid,
+        'passengers': passenger_counts[:0],
+        'station_positions': station_positions[:0],
+        'lines': lines_obs,
+        'timestep': timestep,
+        'game_over': game_over,
+        'score': score,
+        'total_waiting': total_waiting
+    }
+    
     try:
         running = True
         while running and not game_over and timestep < config.max_timesteps:
-            # Create observation
-            grid_obs = [[tile.value for tile in row] for row in grid]
-            
-            passengers_obs = {}
-            for station in stations:
-                pos_tuple = (station['pos'].x, station['pos'].y)
-                passengers_obs[pos_tuple] = station.get('passengers', {
-                    'circle': random.randint(0, 3),
-                    'square': random.randint(0, 3),
-                    'triangle': random.randint(0, 3)
-                })
-            
-            lines_obs = []
-            for line in lines:
-                line_obs = {
-                    'tracks': [(pos.x, pos.y) for pos in line['tracks']],
-                    'train_pos': (line['train_pos'].x, line['train_pos'].y) if line.get('train_pos') else None,
-                    'train_passengers': line.get('train_passengers', []),
-                    'train_direction': line.get('train_direction', 1)
-                }
-                lines_obs.append(line_obs)
-            
-            observation = {
-                'grid': grid_obs,
-                'passengers': passengers_obs,
-                'lines': lines_obs,
-                'timestep': timestep,
-                'game_over': game_over,
-                'score': score
-            }
-            
-            # Render
-            running = renderer.render(observation)
+            # Only build the observation and render every `render_every` steps;
+            # frame pacing (clock.tick) happens inside render, so skipped steps run unthrottled
+            if config.render_every and timestep % config.render_every == 0:
+                # Update observation: passengers are views of the live count matrix
+                observation['passengers'] = passenger_counts[:n_stations]
+                observation['station_positions'] = station_positions[:n_stations]
             
-            # Game logic
-            # Spawn stations
-            if timestep % config.station_spawn_rate == 0 and len(stations) < 10:
-                empty_positions = []
-                for y in range(config.grid_size):
-                    for x in range(config.grid_size):
-                        if grid[y][x] == TileType.EMPTY:
-                            empty_positions.append(Position(x, y))
-                
-                if empty_positions:
-                    pos = random.choice(empty_positions)
-                    station_type = random.choice(list(StationType))
-                    station = {
-                        'pos': pos,
-                        'type': station_type,
-                        'passengers': {
-                            'circle': random.randint(0, 2),
-                            'square': random.randint(0, 2),
-                            'triangle': random.randint(0, 2)
-                        }
-                    }
-                    stations.append(station)
-                    grid[pos.y][pos.x] = TileType(station_type.value)
-            
-            # Simple AI: Create lines occasionally
-            if len(lines) < config.max_lines and timestep % 40 == 0 and len(stations) >= 2:
-                # Try to connect two stations
-                if len(stations) >= 2:
-                    station1 = random.choice(stations)
-                    station2 = random.choice([s for s in stations if s != station1])
-                    
-                    # Create a simple line (just two points for demo)
-                    line = {
-                        'tracks': [station1['pos'], station2['pos']],
-                        'train_pos': station1['pos'],
-                        'train_passengers': [],
+                lines_obs.clear()
+                for ends, track, load, types in zip(line_ends[:n_lines].tolist(),
+                                                    train_track[:n_lines].tolist(),
+                                                    train_load[:n_lines].tolist(),
+                                                    train_types[:n_lines].tolist()):
+                    line_obs = {
+                        'tracks': [tuple(end) for end in ends],
+                        'train_pos': tuple(ends[track]),
+                        'train_passengers': [TILE_NAMES[t] for t in types[:load]],
                         'train_direction': 1
                     }
-                    lines.append(line)
+                    lines_obs.append(line_obs)
             
-            # Move trains
-            for line in lines:
-                if line.get('train_pos') and len(line['tracks']) > 1:
-                    current_track = line['tracks'][0] if random.random() < 0.5 else line['tracks'][1]
-                    line['train_pos'] = current_track
-                    line['train_passengers'] = [random.choice(['circle', 'square', 'triangle']) 
-                                              for _ in range(random.randint(0, 3))]
+                observation['timestep'] = timestep
+                observation['game_over'] = game_over
+                observation['score'] = score
+                observation['total_waiting'] = total_waiting
             
-            # Update passengers
-            for station in stations:
-                if timestep % config.passenger_spawn_rate == 0:
-                    passenger_type = random.choice(['circle', 'square', 'triangle'])
-                    if passenger_type in station['passengers']:
-                        station['passengers'][passenger_type] = min(
-                            station['passengers'][passenger_type] + 1, 5
-                        )
+                # Render
+                running = renderer.render(observation)
             
-            score -= 1  # Time penalty
-            timestep += 1
+            # Simple AI: Create lines occasionally
+            if n_lines < config.max_lines and timestep % 40 == 0 and n_stations >= 2:
+                # Draw two distinct indices directly rather than filtering a copy of the stations
+                i = random.randrange(n_stations)
+                j = random.randrange(n_stations - 1)
+                if j >= i:
+                    j += 1
+                
+                # Create a simple line (just two points for demo), train at the first station
+                line_ends[n_lines, 0] = station_positions[i]
+                line_ends[n_lines, 1] = station_positions[j]
+                train_track[n_lines] = 0
+                train_load[n_lines] = 0
+                n_lines += 1
             
-            # Check for game over (station overflow)
-            for station in stations:
-                total_passengers = sum(station['passengers'].values())
-                if total_passengers >= 10:
-                    game_over = True
-                    score -= 100
-                    break
+            # Spawn stations, move trains, update passengers, apply the time
+            # penalty and check for overflow
+            score_delta, game_over, added, n_free, n_stations = step_world(
+                grid, free_cells, n_free, station_positions, passenger_counts,
+                passenger_total, n_stations, timestep, config.station_spawn_rate,
+                config.passenger_spawn_rate, spawn_cell_draws[timestep],
+                spawn_station_types[timestep], spawn_passengers[timestep],
+                n_lines, train_track, train_load, train_types, train_at_start[timestep],
+                train_loads[timestep], train_passenger_types[timestep],
+                new_passenger_types[timestep]
+            )
+            score += score_delta
+            total_waiting += added
+            timestep += 1
     
     except KeyboardInterrupt:
         print("\nDemo interrupted by user")
     
     finally:
-        renderer.close()
+        if renderer:
+            renderer.close()
     
     print(f"\nDemo completed!")
     print(f"Final score: {score}")
     print(f"Final timestep: {timestep}")
-    print(f"Stations spawned: {len(stations)}")
-    print(f"Lines built: {len(lines)}")
+    print(f"Stations spawned: {n_stations}")
+    print(f"Lines built: {n_lines}")
+    print(f"Passengers still waiting: {total_waiting}")
 
 
 if __name__ == "__main__":
@@ -1,36 +1,49 @@
 #!/usr/bin/env python3
 
+import os
+import sys
 import random
+import numpy as np
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple
-from enum import Enum
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for src
+from src.kernels import njit
+from src.types import _SLOTS
 
-class StationType(Enum):
-    CIRCLE = 'circle'
-    SQUARE = 'square'
-    TRIANGLE = 'triangle'
 
+# Tile codes stored in the numpy grid; plain ints are cheaper to compare than Enum members
+EMPTY, CIRCLE, SQUARE, TRIANGLE = 0, 1, 2, 3
+STATION_CODES = (CIRCLE, SQUARE, TRIANGLE)
+TILE_NAMES = ['empty', 'circle', 'square', 'triangle']
+CHAR = np.array(['.', 'O', '□', '△'])
 
-class TileType(Enum):
-    EMPTY = 'empty'
-    CIRCLE = 'circle'
-    SQUARE = 'square'
-    TRIANGLE = 'triangle'
 
+@njit(cache=True)
+def find_empty_indices(grid):
+    out = np.empty(grid.size, np.int32)
+    k = 0
+    for y in range(grid.shape[0]):
+        for x in range(grid.shape[1]):
+            if grid[y, x] == EMPTY:
+                out[k] = y * grid.shape[1] + x
+                k += 1
+    return out[:k]
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class Position:
     x: int
     y: int
     
     def is_adjacent(self, other: 'Position') -> bool:
-        dx = abs(self.x - other.x)
-        dy = abs(self.y - other.y)
-        return (dx == 1 and dy == 0) or (dx == 0 and dy == 1)
+        # Integer coordinates: squared distance is 1 only for orthogonal neighbours
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return dx * dx + dy * dy == 1
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GameConfig:
     grid_size: int = 5
     max_lines: int = 3
@@ -45,8 +58,10 @@ def main():
     config = GameConfig()
     
     # Initialize game state
-    grid = [[TileType.EMPTY for _ in range(config.grid_size)] 
-            for _ in range(config.grid_size)]
+    grid = np.zeros((config.grid_size, config.grid_size), dtype=np.int8)
+    # Flat indices of free cells, kept up to date as stations are placed so
+    # spawning never has to rescan the grid
+    free_cells = find_empty_indices(grid).tolist()
     stations = []
     lines = []
     timestep = 0
@@ -67,18 +82,16 @@ def main():
         
         # Spawn station
         if timestep % config.station_spawn_rate == 0:
-            empty_positions = []
-            for y in range(config.grid_size):
-                for x in range(config.grid_size):
-                    if grid[y][x] == TileType.EMPTY:
-                        empty_positions.append(Position(x, y))
-            
-            if empty_positions:
-                pos = random.choice(empty_positions)
-                station_type = random.choice(list(StationType))
+            if free_cells:
+                # Swap-pop a random entry: O(1) removal without copying the list
+                i = random.randrange(len(free_cells))
+                free_cells[i], free_cells[-1] = free_cells[-1], free_cells[i]
+                idx = free_cells.pop()
+                pos = Position(idx % config.grid_size, idx // config.grid_size)
+                station_type = random.choice(STATION_CODES)
                 stations.append({'pos': pos, 'type': station_type})
-                grid[pos.y][pos.x] = TileType(station_type.value)
-                print(f"  New station spawned at ({pos.x}, {pos.y}): {station_type.value}")
+                grid[pos.y, pos.x] = station_type
+                print(f"  New station spawned at ({pos.x}, {pos.y}): {TILE_NAMES[station_type]}")
         
         # Simple agent action - try to create a line
         if len(lines) < config.max_lines and step % 3 == 0:
@@ -94,19 +107,7 @@ def main():
         # Display grid
         print("  Grid:")
         for y in range(config.grid_size):
-            row = "    "
-            for x in range(config.grid_size):
-                tile = grid[y][x]
-                if tile == TileType.EMPTY:
-                    row += "."
-                elif tile == TileType.CIRCLE:
-                    row += "O"
-                elif tile == TileType.SQUARE:
-                    row += "□"
-                elif tile == TileType.TRIANGLE:
-                    row += "△"
-                row += " "
-            print(row)
+            print("    " + " ".join(CHAR[grid[y]]))
         
         score -= 1  # Time penalty
         timestep += 1
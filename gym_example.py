@@ -3,12 +3,6 @@
 Simple example showing how to use the MinimetroRL gymnasium environment.
 """
 
-import sys
-import os
-
-# Add the current directory to the path for imports
-sys.path.insert(0, os.path.dirname(__file__))
-
 from src.gym_env import MinimetroGymEnv
 from src.config import GameConfig
 
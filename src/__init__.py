@@ -1,46 +1,65 @@
-from gymnasium.envs.registration import register
+_registered = False
 
-# Register the MinimetroRL environment
-register(
-    id="MinimetroRL-v0",
-    entry_point="minimetro_rl.src.gym_env:MinimetroGymEnv",
-    max_episode_steps=1000,
-    reward_threshold=1000.0,
-    kwargs={
-        "render_mode": None,
-    },
-)
 
-# Register variants with different configurations
-register(
-    id="MinimetroRL-Small-v0",
-    entry_point="minimetro_rl.src.gym_env:MinimetroGymEnv",
-    max_episode_steps=500,
-    reward_threshold=500.0,
-    kwargs={
-        "config": None,  # Will use default small config
-        "render_mode": None,
-    },
-)
+def register_envs() -> None:
+    """Register the MinimetroRL ids with gymnasium so gym.make can find them.
+    
+    Only needed for the gym.make API; constructing MinimetroGymEnv directly
+    does not require it. Safe to call more than once.
+    """
+    global _registered
+    if _registered:
+        return
+    from gymnasium.envs.registration import register
+    
+    # Register the MinimetroRL environment
+    register(
+        id="MinimetroRL-v0",
+        entry_point="minimetro_rl.src.gym_env:MinimetroGymEnv",
+        max_episode_steps=1000,
+        reward_threshold=1000.0,
+        kwargs={
+            "render_mode": None,
+        },
+    )
+
+    # Register variants with different configurations
+    register(
+        id="MinimetroRL-Small-v0",
+        entry_point="minimetro_rl.src.gym_env:MinimetroGymEnv",
+        max_episode_steps=500,
+        reward_threshold=500.0,
+        kwargs={
+            "config": None,  # Will use default small config
+            "render_mode": None,
+        },
+    )
+
+    register(
+        id="MinimetroRL-Visual-v0",
+        entry_point="minimetro_rl.src.gym_env:MinimetroGymEnv",
+        max_episode_steps=1000,
+        reward_threshold=1000.0,
+        kwargs={
+            "render_mode": "human",
+        },
+    )
+    _registered = True
 
-register(
-    id="MinimetroRL-Visual-v0",
-    entry_point="minimetro_rl.src.gym_env:MinimetroGymEnv",
-    max_episode_steps=1000,
-    reward_threshold=1000.0,
-    kwargs={
-        "render_mode": "human",
-    },
-)
 
 # Import main classes for easy access
 from .gym_env import MinimetroGymEnv
+from .vector_env import MinimetroVectorEnv, MinimetroAsyncPool, make_minimetro_async_vec
 from .environment import MinimetroEnvironment
 from .config import GameConfig, RewardConfig
 from .types import Action, Position, StationType
 
 __all__ = [
+    "register_envs",
     "MinimetroGymEnv",
+    "MinimetroVectorEnv",
+    "MinimetroAsyncPool",
+    "make_minimetro_async_vec",
     "MinimetroEnvironment", 
     "GameConfig",
     "RewardConfig",
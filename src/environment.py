@@ -1,24 +1,63 @@
 from typing import Dict, Any, Tuple, Optional
+
+import numpy as np
+
 from .game_engine import GameEngine
-from .types import Action, Position
+from .types import Action, GameState, Position, TileType, pack_position
 from .config import GameConfig, RewardConfig
 
+# Text cell for each grid tile code, indexed by code
+_TILE_TEXT = np.empty(len(TileType), dtype=object)
+_TILE_TEXT[TileType.EMPTY] = ". "
+_TILE_TEXT[TileType.CIRCLE] = "O "
+_TILE_TEXT[TileType.SQUARE] = "□ "
+_TILE_TEXT[TileType.TRIANGLE] = "△ "
+
+# Neighbour offsets, in the order used for create_line and extend_line ids
+_DIRECTIONS = np.array([[0, 1], [0, -1], [1, 0], [-1, 0]])
+
 
 class MinimetroEnvironment:
     def __init__(self, config: GameConfig = None, reward_config: RewardConfig = None):
         self.config = config or GameConfig()
         self.reward_config = reward_config or RewardConfig()
         self.engine = GameEngine(self.config, self.reward_config)
+        self._create_line_pairs = self._adjacent_pairs(self.config.grid_size)
+        self._create_line_by_cell = None
+        
+        # Integer action ids, laid out like the MinimetroGymEnv discrete space:
+        # 0 none, then one create_line id per _create_line_pairs row, then
+        # extend_line per (line slot, end, direction), then remove_line per slot
+        grid_size = self.config.grid_size
+        self._create_from_cell = (self._create_line_pairs[:, 1] * grid_size
+                                  + self._create_line_pairs[:, 0])
+        self._extend_base = 1 + len(self._create_line_pairs)
+        self._remove_base = self._extend_base + self.config.max_lines * 2 * len(_DIRECTIONS)
+    
+    @staticmethod
+    def _adjacent_pairs(grid_size: int) -> np.ndarray:
+        """All in-bounds (from_x, from_y, to_x, to_y) rows for adjacent cells."""
+        ys, xs = np.mgrid[:grid_size, :grid_size]
+        offsets = _DIRECTIONS
+        to_x = xs[..., None] + offsets[:, 0]
+        to_y = ys[..., None] + offsets[:, 1]
+        mask = (to_x >= 0) & (to_x < grid_size) & (to_y >= 0) & (to_y < grid_size)
+        from_x = np.broadcast_to(xs[..., None], to_x.shape)
+        from_y = np.broadcast_to(ys[..., None], to_y.shape)
+        return np.stack([from_x[mask], from_y[mask], to_x[mask], to_y[mask]], axis=1)
     
     def reset(self) -> Dict[str, Any]:
         self.engine.reset()
-        return self.engine.get_observation()
+        return self.engine.obs
     
     def step(self, action_dict: Dict[str, Any]) -> Tuple[Dict[str, Any], int, bool, Dict[str, Any]]:
         action = self._parse_action(action_dict)
         state, reward, done, info = self.engine.step(action)
-        observation = self.engine.get_observation()
-        return observation, reward, done, info
+        return self.engine.obs, reward, done, info
+    
+    def step_without_obs(self, action_dict: Dict[str, Any]) -> Tuple[GameState, int, bool, Dict[str, Any]]:
+        """Like step(), but returns the game state and leaves the observation dict unbuilt."""
+        return self.engine.step(self._parse_action(action_dict))
     
     def _parse_action(self, action_dict: Dict[str, Any]) -> Action:
         action_type = action_dict.get('action', 'none')
@@ -46,28 +85,15 @@ class MinimetroEnvironment:
         return None
     
     def _render_text(self) -> str:
-        obs = self.engine.get_observation()
+        obs = self.engine.obs
         lines = []
         
         lines.append(f"Timestep: {obs['timestep']}, Score: {obs['score']}")
         lines.append(f"Game Over: {obs['game_over']}")
         #lines.append()
         
-        grid = obs['grid']
-        for y in range(len(grid)):
-            row = ""
-            for x in range(len(grid[y])):
-                tile = grid[y][x]
-                if tile == 'empty':
-                    row += "."
-                elif tile == 'circle':
-                    row += "O"
-                elif tile == 'square':
-                    row += "□"
-                elif tile == 'triangle':
-                    row += "△"
-                row += " "
-            lines.append(row)
+        # One fancy-index lookup maps the whole grid to text cells
+        lines.extend("".join(row) for row in _TILE_TEXT[obs['grid']].tolist())
         
         #lines.append()
         
@@ -76,32 +102,37 @@ class MinimetroEnvironment:
             if line_data['train_pos']:
                 lines.append(f"  Train at {line_data['train_pos']} with {len(line_data['train_passengers'])} passengers")
         
-        if obs['passengers']:
+        if len(obs['passengers']):
             #lines.append()
             lines.append("Passengers waiting:")
-            for pos, passenger_dict in obs['passengers'].items():
-                total = sum(passenger_dict.values())
+            totals = obs['passengers'].sum(axis=1).tolist()
+            for pos, total in zip(obs['station_positions'].tolist(), totals):
                 if total > 0:
-                    lines.append(f"  {pos}: {total} passengers")
+                    lines.append(f"  {tuple(pos)}: {total} passengers")
         
         return "\n".join(lines)
     
     def get_valid_actions(self) -> list:
+        """List the currently valid action dicts.
+        
+        create_line is only proposed from station tiles, since a line that
+        starts away from every station cannot carry passengers. Those dicts are
+        built once and shared between calls; treat them as read-only.
+        """
         valid_actions = [{'action': 'none'}]
         
         if len(self.engine.state.lines) < self.config.max_lines:
-            for y in range(self.config.grid_size):
-                for x in range(self.config.grid_size):
-                    pos = Position(x, y)
-                    for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                        adj_pos = Position(x + dx, y + dy)
-                        if (0 <= adj_pos.x < self.config.grid_size and 
-                            0 <= adj_pos.y < self.config.grid_size):
-                            valid_actions.append({
-                                'action': 'create_line',
-                                'from': pos.to_tuple(),
-                                'to': adj_pos.to_tuple()
-                            })
+            grid_size = self.config.grid_size
+            if self._create_line_by_cell is None:
+                by_cell = [[] for _ in range(grid_size * grid_size)]
+                for fx, fy, tx, ty in self._create_line_pairs.tolist():
+                    by_cell[fy * grid_size + fx].append(
+                        {'action': 'create_line', 'from': (fx, fy), 'to': (tx, ty)}
+                    )
+                self._create_line_by_cell = by_cell
+            for station in self.engine.state.stations:
+                pos = station.position
+                valid_actions.extend(self._create_line_by_cell[pos.y * grid_size + pos.x])
         
         for line in self.engine.state.lines:
             valid_actions.append({
@@ -109,16 +140,76 @@ class MinimetroEnvironment:
                 'line_id': line.line_id
             })
             
+            track_set = line._track_set
             for endpoint in [line.tracks[0], line.tracks[-1]]:
                 for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    adj_pos = Position(endpoint.x + dx, endpoint.y + dy)
-                    if (0 <= adj_pos.x < self.config.grid_size and 
-                        0 <= adj_pos.y < self.config.grid_size and
-                        adj_pos not in line.tracks):
+                    x, y = endpoint.x + dx, endpoint.y + dy
+                    if (0 <= x < self.config.grid_size and 
+                        0 <= y < self.config.grid_size and
+                        pack_position(x, y) not in track_set):
                         valid_actions.append({
                             'action': 'extend_line',
                             'line_id': line.line_id,
-                            'to': adj_pos.to_tuple()
+                            'to': (x, y)
                         })
         
-        return valid_actions
\ No newline at end of file
+        return valid_actions
+    
+    def get_valid_action_ids_by_kind(self) -> Dict[str, np.ndarray]:
+        """Currently valid action ids, as one int32 array per action kind.
+        
+        Covers the same actions as get_valid_actions (except 'none', which is
+        always id 0) without building dicts; decode_action turns an id into
+        its action dict.
+        """
+        grid_size = self.config.grid_size
+        n_lines, track_cells, track_len, _, _ = self.engine.line_arrays()
+        
+        if n_lines < self.config.max_lines:
+            from_station = self.engine.state.grid.reshape(-1)[self._create_from_cell] != TileType.EMPTY
+            create_ids = np.flatnonzero(from_station).astype(np.int32) + 1
+        else:
+            create_ids = np.empty(0, dtype=np.int32)
+        
+        extend_ids = []
+        on_track = np.zeros(grid_size * grid_size, dtype=np.bool_)
+        for l in range(n_lines):
+            cells = track_cells[l, :track_len[l]]
+            ends = cells[[0, -1]]
+            # (end, direction) candidates, flattened in id order
+            xs = (ends % grid_size)[:, None] + _DIRECTIONS[:, 0]
+            ys = (ends // grid_size)[:, None] + _DIRECTIONS[:, 1]
+            in_bounds = (xs >= 0) & (xs < grid_size) & (ys >= 0) & (ys < grid_size)
+            on_track[cells] = True
+            valid = in_bounds & ~on_track[np.where(in_bounds, ys * grid_size + xs, 0)]
+            on_track[cells] = False
+            extend_ids.append(np.flatnonzero(valid) + self._extend_base + l * valid.size)
+        
+        return {
+            'create_line': create_ids,
+            'extend_line': (np.concatenate(extend_ids).astype(np.int32) if extend_ids
+                            else np.empty(0, dtype=np.int32)),
+            'remove_line': np.arange(self._remove_base, self._remove_base + n_lines, dtype=np.int32),
+        }
+    
+    def decode_action(self, action_id: int) -> Dict[str, Any]:
+        """Action dict for an id from get_valid_action_ids_by_kind."""
+        action_id = int(action_id)
+        if 1 <= action_id < self._extend_base:
+            fx, fy, tx, ty = self._create_line_pairs[action_id - 1].tolist()
+            return {'action': 'create_line', 'from': (fx, fy), 'to': (tx, ty)}
+        
+        lines = self.engine.state.lines
+        if self._extend_base <= action_id < self._remove_base:
+            l, rest = divmod(action_id - self._extend_base, 2 * len(_DIRECTIONS))
+            from_end, d = divmod(rest, len(_DIRECTIONS))
+            if l < len(lines):
+                end = lines[l].tracks[-1] if from_end else lines[l].tracks[0]
+                dx, dy = _DIRECTIONS[d].tolist()
+                return {'action': 'extend_line', 'line_id': lines[l].line_id,
+                        'to': (end.x + dx, end.y + dy)}
+        
+        elif 0 <= action_id - self._remove_base < len(lines):
+            return {'action': 'remove_line', 'line_id': lines[action_id - self._remove_base].line_id}
+        
+        return {'action': 'none'}
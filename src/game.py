@@ -103,14 +103,12 @@ class SimpleAgent:
         self.env = env
     
     def get_action(self, observation: Dict[str, Any]) -> Dict[str, Any]:
-        valid_actions = self.env.get_valid_actions()
+        ids_by_kind = self.env.get_valid_action_ids_by_kind()
+        rng = self.env.engine.np_random
         
-        create_actions = [a for a in valid_actions if a['action'] == 'create_line']
-        if create_actions:
-            return self.env.engine.random.choice(create_actions)
+        for kind in ('create_line', 'extend_line'):
+            ids = ids_by_kind[kind]
+            if len(ids):
+                return self.env.decode_action(ids[rng.integers(len(ids))])
         
-        extend_actions = [a for a in valid_actions if a['action'] == 'extend_line']
-        if extend_actions:
-            return self.env.engine.random.choice(extend_actions)
-        
-        return {'action': 'none'}
\ No newline at end of file
+        return {'action': 'none'}
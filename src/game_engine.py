@@ -1,23 +1,75 @@
 import random
 from typing import List, Optional, Tuple, Dict, Any
+
+import numpy as np
+
 from .types import (
     GameState, Station, Line, Train, Action, Position, 
-    StationType, TileType
+    StationType, TileType, STATION_INDEX, STATION_NAMES, pack_position
 )
 from .config import GameConfig, RewardConfig, STATION_TYPES, EMPTY_TILE
+from .kernels import NUMBA_AVAILABLE, tick_trains
+
+# Station types new stations are drawn from, in STATION_TYPES order
+_SPAWN_TYPES = [StationType[name.upper()] for name in STATION_TYPES]
 
 
 class GameEngine:
     def __init__(self, config: GameConfig, reward_config: RewardConfig = None):
         self.config = config
         self.reward_config = reward_config or RewardConfig()
+        
+        # Observation buffers are allocated once and overwritten in place;
+        # rows follow the order in which stations spawned
+        self._obs_station_positions = np.zeros((config.max_stations, 2), dtype=np.int16)
+        self._obs_passengers = np.zeros((config.max_stations, len(StationType)), dtype=np.int32)
+        self._obs_lines: List[Dict[str, Any]] = []
+        self._obs: Dict[str, Any] = {}
+        
+        # Array mirror of lines, trains and stations, one row per line in list
+        # order. Rows are patched in place whenever a line is created, extended
+        # or removed and after every train tick, so they always match the Line
+        # and Train objects; the compiled tick and the gym wrapper read them.
+        n_cells = config.grid_size * config.grid_size
+        self._use_jit = NUMBA_AVAILABLE
+        self._track_cells = np.zeros((config.max_lines, n_cells), dtype=np.int32)
+        self._track_len = np.zeros(config.max_lines, dtype=np.int32)
+        self._train_idx = np.zeros(config.max_lines, dtype=np.int32)
+        self._train_dir = np.ones(config.max_lines, dtype=np.int32)
+        self._train_cargo = np.zeros((config.max_lines, len(StationType)), dtype=np.int16)
+        self._line_types = np.zeros((config.max_lines, len(StationType)), dtype=np.bool_)
+        self._visited = np.full(config.max_lines, -1, dtype=np.int16)
+        self._station_at = np.full(n_cells, -1, dtype=np.int16)
+        
+        # Waiting passengers per tile and destination type (STATION_INDEX channel);
+        # Station.passengers are views of their tile's channels. _passengers_flat
+        # is the same memory indexed by flat cell, and _station_cells maps
+        # station rows (spawn order) to those cells.
+        self.passengers_grid = np.zeros(
+            (config.grid_size, config.grid_size, len(StationType)), dtype=np.int32
+        )
+        self._passengers_flat = self.passengers_grid.reshape(n_cells, len(StationType))
+        self._station_cells = np.zeros(config.max_stations, dtype=np.intp)
+        self._station_type_idx = np.zeros(config.max_stations, dtype=np.int8)
+        
         self.state = self._initialize_game_state()
         self.random = random.Random()
+        self.np_random = np.random.default_rng()
         self._next_line_id = 0
+        self._overflow = False  # set once any station reaches station_capacity
+        self._obs_stale = True  # obs is rebuilt on first read after reset/step
     
     def _initialize_game_state(self) -> GameState:
-        grid = [[TileType.EMPTY for _ in range(self.config.grid_size)] 
-                for _ in range(self.config.grid_size)]
+        grid = np.full((self.config.grid_size, self.config.grid_size), TileType.EMPTY, dtype=np.int8)
+        
+        # Empty tiles are tracked incrementally so spawning never rescans the grid;
+        # _empty_index maps a cell to its slot in _empty_cells for O(1) removal
+        self._empty_cells: List[Tuple[int, int]] = [
+            (x, y) for y in range(self.config.grid_size) for x in range(self.config.grid_size)
+        ]
+        self._empty_index: Dict[Tuple[int, int], int] = {
+            cell: i for i, cell in enumerate(self._empty_cells)
+        }
         
         return GameState(
             grid=grid,
@@ -28,9 +80,17 @@ class GameEngine:
             score=0
         )
     
+    def seed(self, seed: Optional[int] = None):
+        self.random.seed(seed)
+        self.np_random = np.random.default_rng(seed)
+    
     def reset(self) -> GameState:
         self.state = self._initialize_game_state()
         self._next_line_id = 0
+        self._overflow = False
+        self._station_at.fill(-1)
+        self.passengers_grid.fill(0)
+        self._obs_stale = True
         return self.state
     
     def step(self, action: Action) -> Tuple[GameState, int, bool, Dict[str, Any]]:
@@ -44,8 +104,12 @@ class GameEngine:
             action_result = self._execute_action(action)
             info['action_result'] = action_result
         
-        self._update_trains()
-        delivered_passengers = self._handle_passenger_pickup_dropoff()
+        if self._use_jit:
+            delivered_passengers = self._tick_trains_jit()
+        else:
+            self._update_trains()
+            delivered_passengers = self._handle_passenger_pickup_dropoff()
+            self._sync_train_arrays()
         reward += delivered_passengers * self.reward_config.passenger_delivered
         
         self._spawn_stations()
@@ -60,6 +124,7 @@ class GameEngine:
         
         info['delivered_passengers'] = delivered_passengers
         
+        self._obs_stale = True
         return self.state, reward, self.state.game_over, info
     
     def _execute_action(self, action: Action) -> Dict[str, Any]:
@@ -87,11 +152,25 @@ class GameEngine:
         if not from_pos.is_adjacent(to_pos):
             return {'success': False, 'error': 'Positions must be adjacent'}
         
-        line = Line(line_id=self._next_line_id, tracks=[from_pos, to_pos])
+        line = Line(line_id=self._next_line_id, tracks=[from_pos, to_pos],
+                    train_capacity=self.config.train_capacity)
         
         self.state.lines.append(line)
         self._next_line_id += 1
         
+        l = len(self.state.lines) - 1
+        grid_size = self.config.grid_size
+        self._track_cells[l, 0] = from_pos.y * grid_size + from_pos.x
+        self._track_cells[l, 1] = to_pos.y * grid_size + to_pos.x
+        self._track_len[l] = 2
+        self._train_idx[l] = line.train.track_idx
+        self._train_dir[l] = line.train.direction
+        self._train_cargo[l] = 0
+        self._line_types[l] = False
+        for code in self.state.grid.reshape(-1)[self._track_cells[l, :2]].tolist():
+            if code != TileType.EMPTY:
+                self._line_types[l, code - 1] = True
+        
         return {'success': True, 'line_id': line.line_id}
     
     def _extend_line(self, line_id: int, to_pos: Position) -> Dict[str, Any]:
@@ -105,6 +184,20 @@ class GameEngine:
         if not line.add_track(to_pos):
             return {'success': False, 'error': 'Cannot extend line to that position'}
         
+        l = self.state.lines.index(line)
+        length = self._track_len[l]
+        cell = to_pos.y * self.config.grid_size + to_pos.x
+        row = self._track_cells[l]
+        if line.tracks[0] == to_pos:
+            row[1:length + 1] = row[:length].copy()
+            row[0] = cell
+        else:
+            row[length] = cell
+        self._track_len[l] = length + 1
+        self._train_idx[l] = line.train.track_idx
+        code = self.state.grid[to_pos.y, to_pos.x]
+        if code != TileType.EMPTY:
+            self._line_types[l, code - 1] = True
         return {'success': True}
     
     def _remove_line(self, line_id: int) -> Dict[str, Any]:
@@ -112,9 +205,61 @@ class GameEngine:
         if not line:
             return {'success': False, 'error': 'Line not found'}
         
+        l = self.state.lines.index(line)
         self.state.lines.remove(line)
+        
+        # Shift the rows of the later lines down to keep list order
+        n = len(self.state.lines)
+        for arr in (self._track_cells, self._track_len, self._train_idx,
+                    self._train_dir, self._train_cargo, self._line_types):
+            arr[l:n] = arr[l + 1:n + 1]
         return {'success': True}
     
+    def line_arrays(self) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Array mirror of the lines as (n_lines, track_cells, track_len, train_idx, train_cargo).
+        
+        track_cells rows hold flat cells (y * grid_size + x), valid up to
+        track_len; train_cargo counts passengers per destination type. Rows
+        past n_lines are stale. The arrays are live engine state: read only.
+        """
+        return (len(self.state.lines), self._track_cells, self._track_len,
+                self._train_idx, self._train_cargo)
+    
+    def _sync_train_arrays(self):
+        # The Python tick moves trains on the objects; mirror them into the arrays
+        for l, line in enumerate(self.state.lines):
+            train = line.train
+            self._train_idx[l] = train.track_idx
+            self._train_dir[l] = train.direction
+            self._train_cargo[l] = [train.passengers.count(st) for st in StationType]
+    
+    def _tick_trains_jit(self) -> int:
+        lines = self.state.lines
+        if not lines:
+            return 0
+        
+        delivered = tick_trains(
+            len(lines), self._track_cells, self._track_len, self._train_idx,
+            self._train_dir, self._train_cargo, self._line_types, self.state.grid.reshape(-1),
+            self._station_at, self._passengers_flat, self.config.train_capacity,
+            self._visited
+        )
+        
+        # Copy the new train state back onto the objects; passenger lists only
+        # change where a train stopped at a station
+        for l, line in enumerate(lines):
+            train = line.train
+            train.track_idx = int(self._train_idx[l])
+            train.position = line.tracks[train.track_idx]
+            train.direction = int(self._train_dir[l])
+            if self._visited[l] >= 0:
+                train.passengers = [
+                    st for st, count in zip(StationType, self._train_cargo[l].tolist())
+                    for _ in range(count)
+                ]
+        
+        return int(delivered)
+    
     def _update_trains(self):
         for line in self.state.lines:
             if not line.train or not line.tracks:
@@ -124,14 +269,10 @@ class GameEngine:
     
     def _move_train(self, line: Line):
         train = line.train
-        current_idx = None
+        current_idx = train.track_idx
         
-        for i, pos in enumerate(line.tracks):
-            if pos == train.position:
-                current_idx = i
-                break
-        
-        if current_idx is None:
+        if not 0 <= current_idx < len(line.tracks):
+            train.track_idx = 0
             train.position = line.tracks[0]
             return
         
@@ -145,6 +286,7 @@ class GameEngine:
             next_idx = len(line.tracks) - 2
         
         if 0 <= next_idx < len(line.tracks):
+            train.track_idx = next_idx
             train.position = line.tracks[next_idx]
     
     def _handle_passenger_pickup_dropoff(self) -> int:
@@ -170,12 +312,15 @@ class GameEngine:
     def _pickup_passengers(self, train: Train, station: Station, line: Line):
         station_types_on_line = line.get_station_types_on_line(self.state.grid)
         
-        for destination_type in station_types_on_line:
-            if destination_type == station.station_type:
+        # Walk types in a fixed order so loading is deterministic when capacity runs out
+        for destination_type in StationType:
+            if (destination_type == station.station_type or
+                    destination_type not in station_types_on_line):
                 continue
             
+            i = STATION_INDEX[destination_type]
             while (train.has_capacity() and 
-                   station.passengers[destination_type] > 0):
+                   station.passengers[i] > 0):
                 station.remove_passengers(destination_type, 1)
                 train.add_passenger(destination_type)
     
@@ -183,72 +328,112 @@ class GameEngine:
         if (self.state.timestep % self.config.station_spawn_rate == 0 and 
             len(self.state.stations) < self.config.max_stations):
             
-            empty_positions = self._get_empty_positions()
-            if empty_positions:
-                pos = self.random.choice(empty_positions)
-                station_type = StationType(self.random.choice(STATION_TYPES))
+            if self._empty_cells:
+                cell = self._empty_cells[self.random.randrange(len(self._empty_cells))]
+                self._remove_empty_cell(cell)
+                pos = Position(*cell)
+                station_type = self.random.choice(_SPAWN_TYPES)
+                
+                row = len(self.state.stations)
+                flat = pos.y * self.config.grid_size + pos.x
+                self._station_cells[row] = flat
+                self._station_type_idx[row] = STATION_INDEX[station_type]
+                station = Station(position=pos, station_type=station_type,
+                                  passengers=self._passengers_flat[flat],
+                                  capacity=self.config.station_capacity)
+                self._obs_station_positions[row] = cell
+                self._station_at[flat] = row
+                self.state.add_station(station)
+                self.state.grid[pos.y, pos.x] = station_type
                 
-                station = Station(position=pos, station_type=station_type)
-                self.state.stations.append(station)
-                self.state.grid[pos.y][pos.x] = TileType(station_type.value)
+                key = pack_position(pos.x, pos.y)
+                for l, line in enumerate(self.state.lines):
+                    if key in line._track_set:
+                        line.invalidate_station_types()
+                        self._line_types[l, STATION_INDEX[station_type]] = True
     
     def _generate_passengers(self):
-        if self.state.timestep % self.config.passenger_spawn_rate == 0:
-            for station in self.state.stations:
-                if station.total_passengers() < self.config.station_capacity:
-                    available_destinations = [st for st in StationType 
-                                            if st != station.station_type]
-                    if available_destinations:
-                        destination = self.random.choice(available_destinations)
-                        station.add_passenger(destination)
-    
-    def _get_empty_positions(self) -> List[Position]:
-        empty_positions = []
-        for y in range(self.config.grid_size):
-            for x in range(self.config.grid_size):
-                if self.state.grid[y][x] == TileType.EMPTY:
-                    empty_positions.append(Position(x, y))
-        return empty_positions
+        if self.state.timestep % self.config.passenger_spawn_rate != 0:
+            return
+        
+        n_stations = len(self.state.stations)
+        capacity = self.config.station_capacity
+        cells = self._station_cells[:n_stations]
+        totals = self._passengers_flat[cells].sum(axis=1)
+        eligible = np.flatnonzero(totals < capacity)
+        if not len(eligible):
+            return
+        
+        # One batched draw over the other types: sample from n_types - 1 slots
+        # and shift past each station's own type
+        destinations = self.np_random.integers(0, len(StationType) - 1, size=len(eligible))
+        destinations += destinations >= self._station_type_idx[eligible]
+        self._passengers_flat[cells[eligible], destinations] += 1
+        
+        # Passengers only accumulate here, so this is the one place a station
+        # can reach capacity
+        if (totals[eligible] + 1 >= capacity).any():
+            self._overflow = True
+    
+    def _remove_empty_cell(self, cell: Tuple[int, int]):
+        # Swap the last entry into the removed slot, then pop: O(1)
+        idx = self._empty_index.pop(cell)
+        last = self._empty_cells.pop()
+        if last != cell:
+            self._empty_cells[idx] = last
+            self._empty_index[last] = idx
     
     def _is_valid_position(self, pos: Position) -> bool:
         return (0 <= pos.x < self.config.grid_size and 
                 0 <= pos.y < self.config.grid_size)
     
     def _check_game_over(self) -> bool:
-        if self.state.timestep >= self.config.max_timesteps:
-            return True
-        
-        for station in self.state.stations:
-            if station.total_passengers() >= self.config.station_capacity:
-                return True
-        
-        return False
+        return self.state.timestep >= self.config.max_timesteps or self._overflow
+    
+    @property
+    def obs(self) -> Dict[str, Any]:
+        """Observation as of the last reset() or step().
+        
+        Built on first access after each reset() or step(), so callers that
+        only read the engine arrays never pay for the per-line dicts.
+        """
+        if self._obs_stale:
+            self.get_observation()
+        return self._obs
+    
+    @property
+    def station_positions(self) -> np.ndarray:
+        """(n_stations, 2) x, y of every station, in spawn order (a reused buffer)."""
+        return self._obs_station_positions[:len(self.state.stations)]
     
     def get_observation(self) -> Dict[str, Any]:
-        grid_obs = [[tile.value for tile in row] for row in self.state.grid]
+        """Rebuild and return the observation dict.
         
-        passengers_obs = {}
-        for station in self.state.stations:
-            pos_tuple = station.position.to_tuple()
-            passengers_obs[pos_tuple] = {
-                st.value: station.passengers[st] for st in StationType
-            }
+        The dict and its arrays are reused between calls and overwritten on the
+        next one; copy anything that has to outlive the current step.
+        """
+        n_stations = len(self.state.stations)
         
-        lines_obs = []
+        lines_obs = self._obs_lines
+        lines_obs.clear()
         for line in self.state.lines:
             line_obs = {
                 'tracks': [pos.to_tuple() for pos in line.tracks],
                 'train_pos': line.train.position.to_tuple() if line.train else None,
-                'train_passengers': [p.value for p in line.train.passengers] if line.train else [],
+                'train_passengers': [STATION_NAMES[p] for p in line.train.passengers] if line.train else [],
                 'train_direction': line.train.direction if line.train else 1
             }
             lines_obs.append(line_obs)
         
-        return {
-            'grid': grid_obs,
-            'passengers': passengers_obs,
-            'lines': lines_obs,
-            'timestep': self.state.timestep,
-            'game_over': self.state.game_over,
-            'score': self.state.score
-        }
\ No newline at end of file
+        obs = self._obs
+        obs['grid'] = self.state.grid
+        np.take(self._passengers_flat, self._station_cells[:n_stations], axis=0,
+                out=self._obs_passengers[:n_stations])
+        obs['passengers'] = self._obs_passengers[:n_stations]
+        obs['station_positions'] = self._obs_station_positions[:n_stations]
+        obs['lines'] = lines_obs
+        obs['timestep'] = self.state.timestep
+        obs['game_over'] = self.state.game_over
+        obs['score'] = self.state.score
+        self._obs_stale = False
+        return obs
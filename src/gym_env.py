@@ -1,11 +1,153 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-from typing import Any, Dict, List, Optional, Tuple, Union
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from .environment import MinimetroEnvironment
 from .config import GameConfig, RewardConfig
-from .types import Position, StationType
+from .kernels import NUMBA_AVAILABLE, pack_obs
+from .types import Position
+
+
+# Action kinds stored in the per-action table
+ACTION_NONE, ACTION_CREATE, ACTION_EXTEND, ACTION_REMOVE = 0, 1, 2, 3
+_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+def _action_key(action_dict: Dict[str, Any]) -> tuple:
+    """Hashable key for a discrete action in dict form."""
+    kind = action_dict["action"]
+    if kind == "create_line":
+        return (kind, tuple(action_dict["from"]), tuple(action_dict["to"]))
+    if kind == "extend_line":
+        return (kind, action_dict["line_id"], action_dict["from_end"], tuple(action_dict["direction"]))
+    if kind == "remove_line":
+        return (kind, action_dict["line_id"])
+    return ("none",)
+
+
+def build_action_table(grid_size: int, max_lines: int) -> Tuple[np.ndarray, ...]:
+    """Build the per-field arrays mapping discrete indices to actions.
+    
+    Returns (kind, from_xy, to_xy, line_id, from_end, direction), one row per
+    index, in the order: none, create_line (each position to each in-bounds
+    neighbour), extend_line (line x end x direction), remove_line.
+    """
+    n_create = 4 * grid_size * (grid_size - 1)
+    n_actions = 1 + n_create + max_lines * 2 * 4 + max_lines
+    
+    kind = np.zeros(n_actions, dtype=np.int8)
+    from_xy = np.zeros((n_actions, 2), dtype=np.int16)
+    to_xy = np.zeros((n_actions, 2), dtype=np.int16)
+    line_id = np.zeros(n_actions, dtype=np.int16)
+    from_end = np.zeros(n_actions, dtype=np.bool_)
+    direction = np.zeros((n_actions, 2), dtype=np.int8)
+    
+    # none action
+    action_idx = 1
+    
+    # create_line actions
+    for y in range(grid_size):
+        for x in range(grid_size):
+            for dx, dy in _DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < grid_size and 0 <= ny < grid_size:
+                    kind[action_idx] = ACTION_CREATE
+                    from_xy[action_idx] = (x, y)
+                    to_xy[action_idx] = (nx, ny)
+                    action_idx += 1
+    
+    # extend_line actions (for each possible line)
+    for line in range(max_lines):
+        for is_end in [False, True]:  # start or end of line
+            for d in _DIRECTIONS:
+                kind[action_idx] = ACTION_EXTEND
+                line_id[action_idx] = line
+                from_end[action_idx] = is_end
+                direction[action_idx] = d
+                action_idx += 1
+    
+    # remove_line actions
+    for line in range(max_lines):
+        kind[action_idx] = ACTION_REMOVE
+        line_id[action_idx] = line
+        action_idx += 1
+    
+    return kind, from_xy, to_xy, line_id, from_end, direction
+
+
+def make_action_space(config: GameConfig) -> spaces.Discrete:
+    """
+    Create discrete action space.
+    
+    Actions are:
+    0: none
+    1-N: create_line actions (from each position to adjacent positions)
+    N+1-M: extend_line actions (extend each line to adjacent positions)
+    M+1-L: remove_line actions (remove each line)
+    """
+    # Calculate maximum possible actions
+    grid_size = config.grid_size
+    max_lines = config.max_lines
+    
+    # none action
+    total_actions = 1
+    
+    # create_line actions: each position can connect to 4 adjacent positions
+    # but we need to be more conservative to avoid overflow
+    max_create_actions = grid_size * grid_size * 4
+    total_actions += max_create_actions
+    
+    # extend_line actions: each line can be extended from either end to 4 directions
+    max_extend_actions = max_lines * 2 * 4
+    total_actions += max_extend_actions
+    
+    # remove_line actions: can remove each line
+    max_remove_actions = max_lines
+    total_actions += max_remove_actions
+    
+    return spaces.Discrete(total_actions)
+
+
+def make_observation_space(config: GameConfig) -> spaces.Dict:
+    """Create observation space matching the game's observation format."""
+    grid_size = config.grid_size
+    max_lines = config.max_lines
+    
+    return spaces.Dict({
+        # Grid: 2D array of tile types (0=empty, 1=circle, 2=square, 3=triangle)
+        "grid": spaces.Box(
+            low=0, high=3, shape=(grid_size, grid_size), dtype=np.int32
+        ),
+        
+        # Passenger counts at each position (3D: position x station_type)
+        "passengers": spaces.Box(
+            low=0, high=50, shape=(grid_size, grid_size, 3), dtype=np.int32
+        ),
+        
+        # Line information (tracks, train position, train passengers)
+        "lines": spaces.Box(
+            low=0, high=grid_size*grid_size, shape=(max_lines, grid_size*grid_size + 2 + 3), dtype=np.int32
+        ),
+        
+        # Game state
+        "timestep": spaces.Box(low=0, high=config.max_timesteps, shape=(), dtype=np.int32),
+        "score": spaces.Box(low=-float('inf'), high=float('inf'), shape=(), dtype=np.float32),
+        "game_over": spaces.Box(low=0, high=1, shape=(), dtype=np.int32),
+    })
+
+
+def make_flat_observation_space(config: GameConfig) -> spaces.Box:
+    """Flat float32 Box holding the make_observation_space fields back to back.
+    
+    Fields are laid out in the Dict's order (grid, passengers, lines,
+    timestep, score, game_over), each flattened in C order.
+    """
+    fields = make_observation_space(config).spaces.values()
+    low = np.concatenate([np.ravel(space.low) for space in fields]).astype(np.float32)
+    high = np.concatenate([np.ravel(space.high) for space in fields]).astype(np.float32)
+    return spaces.Box(low=low, high=high, dtype=np.float32)
 
 
 class MinimetroGymEnv(gym.Env):
@@ -14,6 +156,14 @@ class MinimetroGymEnv(gym.Env):
     
     This environment provides a standard gym interface for the MinimetroRL game,
     with discrete action space and multi-dimensional observation space.
+    
+    reset() and step() return the same observation dict each time, with its
+    arrays overwritten in place; copy it to keep an observation past the
+    next step. Callers that only need rewards can step inside no_obs() (or
+    reset with options={"skip_obs": True}), where step() leaves the dict
+    as it was. With flat_obs=True observations are a single float32 vector
+    (see make_flat_observation_space) instead of a dict, which vector envs
+    batch with one stack instead of one per field.
     """
     
     metadata = {
@@ -21,17 +171,22 @@ class MinimetroGymEnv(gym.Env):
         "render_fps": 30,
     }
     
+    # (grid_size, max_lines) -> (action table arrays, reverse lookup), read-only
+    _ACTION_TABLES_CACHE: Dict[Tuple[int, int], Tuple[Tuple[np.ndarray, ...], Dict[tuple, int]]] = {}
+    
     def __init__(
         self,
         config: Optional[GameConfig] = None,
         reward_config: Optional[RewardConfig] = None,
         render_mode: Optional[str] = None,
+        flat_obs: bool = False,
     ):
         super().__init__()
         
         self.config = config or GameConfig()
         self.reward_config = reward_config or RewardConfig()
         self.render_mode = render_mode
+        self.flat_obs = flat_obs
         
         # Initialize the core environment
         self.env = MinimetroEnvironment(self.config, self.reward_config)
@@ -43,260 +198,249 @@ class MinimetroGymEnv(gym.Env):
         self.observation_space = self._create_observation_space()
         
         # Initialize state
-        self._state = None
         self._info = {}
         
-        # Action mapping
-        self._action_map = self._create_action_map()
-        
-    def _create_action_space(self) -> spaces.Discrete:
-        """
-        Create discrete action space.
-        
-        Actions are:
-        0: none
-        1-N: create_line actions (from each position to adjacent positions)
-        N+1-M: extend_line actions (extend each line to adjacent positions)
-        M+1-L: remove_line actions (remove each line)
-        """
-        # Calculate maximum possible actions
-        grid_size = self.config.grid_size
-        max_lines = self.config.max_lines
-        
-        # none action
-        total_actions = 1
-        
-        # create_line actions: each position can connect to 4 adjacent positions
-        # but we need to be more conservative to avoid overflow
-        max_create_actions = grid_size * grid_size * 4
-        total_actions += max_create_actions
-        
-        # extend_line actions: each line can be extended from either end to 4 directions
-        max_extend_actions = max_lines * 2 * 4
-        total_actions += max_extend_actions
-        
-        # remove_line actions: can remove each line
-        max_remove_actions = max_lines
-        total_actions += max_remove_actions
-        
-        return spaces.Discrete(total_actions)
-        
-    def _create_observation_space(self) -> spaces.Dict:
-        """Create observation space matching the game's observation format."""
+        # Observation buffers, overwritten in place every step and returned as
+        # the same object; copy an observation to keep it past the next step.
+        # The grid is a copy of the engine grid, patched only when stations
+        # spawn. With flat_obs the fields are float32 views into one vector,
+        # which is what reset() and step() return.
         grid_size = self.config.grid_size
-        max_lines = self.config.max_lines
-        
-        return spaces.Dict({
-            # Grid: 2D array of tile types (0=empty, 1=circle, 2=square, 3=triangle)
-            "grid": spaces.Box(
-                low=0, high=3, shape=(grid_size, grid_size), dtype=np.int32
-            ),
-            
-            # Passenger counts at each position (3D: position x station_type)
-            "passengers": spaces.Box(
-                low=0, high=50, shape=(grid_size, grid_size, 3), dtype=np.int32
-            ),
-            
-            # Line information (tracks, train position, train passengers)
-            "lines": spaces.Box(
-                low=0, high=grid_size*grid_size, shape=(max_lines, grid_size*grid_size + 2 + 3), dtype=np.int32
-            ),
-            
-            # Game state
-            "timestep": spaces.Box(low=0, high=self.config.max_timesteps, shape=(), dtype=np.int32),
-            "score": spaces.Box(low=-float('inf'), high=float('inf'), shape=(), dtype=np.float32),
-            "game_over": spaces.Box(low=0, high=1, shape=(), dtype=np.int32),
-        })
-        
-    def _create_action_map(self) -> Dict[int, Dict[str, Any]]:
-        """Create mapping from discrete action indices to action dictionaries."""
-        action_map = {}
-        action_idx = 0
-        
-        # none action
-        action_map[action_idx] = {"action": "none"}
-        action_idx += 1
-        
-        # create_line actions
-        for y in range(self.config.grid_size):
-            for x in range(self.config.grid_size):
-                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.config.grid_size and 0 <= ny < self.config.grid_size:
-                        action_map[action_idx] = {
-                            "action": "create_line",
-                            "from": (x, y),
-                            "to": (nx, ny)
-                        }
-                        action_idx += 1
-        
-        # extend_line actions (for each possible line)
-        for line_id in range(self.config.max_lines):
-            for is_end in [False, True]:  # start or end of line
-                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    action_map[action_idx] = {
-                        "action": "extend_line",
-                        "line_id": line_id,
-                        "from_end": is_end,
-                        "direction": (dx, dy)
-                    }
-                    action_idx += 1
-        
-        # remove_line actions
-        for line_id in range(self.config.max_lines):
-            action_map[action_idx] = {
-                "action": "remove_line",
-                "line_id": line_id
+        dict_space = make_observation_space(self.config)
+        if flat_obs:
+            self._flat_obs = np.zeros(self.observation_space.shape, dtype=np.float32)
+            self._obs = {}
+            offset = 0
+            for name, space in dict_space.spaces.items():
+                size = int(np.prod(space.shape))
+                self._obs[name] = self._flat_obs[offset:offset + size].reshape(space.shape)
+                offset += size
+            self._obs_out = self._flat_obs
+        else:
+            self._obs = {
+                name: np.zeros(space.shape, dtype=space.dtype)
+                for name, space in dict_space.spaces.items()
             }
-            action_idx += 1
+            self._obs_out = self._obs
+        self._grid_buf = self._obs["grid"]
+        self._grid_stations = 0
+        self._skip_obs = False
+        self._cell_range = np.arange(grid_size * grid_size)
+        
+        # Action table (one array per field), plus its inverse for turning
+        # action dicts back into indices; shared by every env of the same shape
+        key = (self.config.grid_size, self.config.max_lines)
+        cached = self._ACTION_TABLES_CACHE.get(key)
+        if cached is None:
+            tables = build_action_table(*key)
+            for table in tables:
+                table.setflags(write=False)
+            (self._akind, self._afrom, self._ato, self._aline,
+             self._afrom_end, self._adir) = tables
+            reverse = {self._table_key(idx): idx for idx in range(len(self._akind))}
+            cached = self._ACTION_TABLES_CACHE[key] = (tables, reverse)
+        tables, self._action_reverse = cached
+        (self._akind, self._afrom, self._ato, self._aline,
+         self._afrom_end, self._adir) = tables
         
-        return action_map
+    def _create_action_space(self) -> spaces.Discrete:
+        return make_action_space(self.config)
+        
+    def _create_observation_space(self) -> Union[spaces.Dict, spaces.Box]:
+        if self.flat_obs:
+            return make_flat_observation_space(self.config)
+        return make_observation_space(self.config)
+        
+    def _table_key(self, action: int) -> tuple:
+        """Hashable key for a table entry, matching _action_key."""
+        kind = self._akind[action]
+        if kind == ACTION_CREATE:
+            return ("create_line", tuple(self._afrom[action].tolist()), tuple(self._ato[action].tolist()))
+        if kind == ACTION_EXTEND:
+            return ("extend_line", int(self._aline[action]), bool(self._afrom_end[action]),
+                    tuple(self._adir[action].tolist()))
+        if kind == ACTION_REMOVE:
+            return ("remove_line", int(self._aline[action]))
+        return ("none",)
         
     def _convert_action(self, action: int) -> Dict[str, Any]:
         """Convert discrete action to action dictionary."""
-        if action not in self._action_map:
+        if not 0 <= action < len(self._akind):
             return {"action": "none"}
-            
-        action_dict = self._action_map[action].copy()
         
-        # Handle extend_line actions that need position calculation
-        if action_dict["action"] == "extend_line":
-            line_id = action_dict["line_id"]
-            
-            # Check if line exists
-            if line_id >= len(self.env.engine.state.lines):
-                return {"action": "none"}
-                
-            line = self.env.engine.state.lines[line_id]
-            from_end = action_dict["from_end"]
-            dx, dy = action_dict["direction"]
+        kind = self._akind[action]
+        if kind == ACTION_CREATE:
+            fx, fy = self._afrom[action].tolist()
+            tx, ty = self._ato[action].tolist()
+            return {"action": "create_line", "from": (fx, fy), "to": (tx, ty)}
+        
+        # Discrete actions address lines by their slot in the engine's line
+        # list (like MinimetroVectorEnv); the engine takes line ids
+        lines = self.env.engine.state.lines
+        slot = int(self._aline[action])
+        if slot >= len(lines):
+            return {"action": "none"}
+        
+        if kind == ACTION_REMOVE:
+            return {"action": "remove_line", "line_id": lines[slot].line_id}
+        
+        if kind == ACTION_EXTEND:
+            _, track_cells, track_len, _, _ = self.env.engine.line_arrays()
             
-            # Get position to extend from
-            pos = line.tracks[-1] if from_end else line.tracks[0]
-            to_pos = Position(pos.x + dx, pos.y + dy)
+            # Extend from the chosen end in the chosen direction; ends are read
+            # from the engine's flat track cells
+            grid_size = self.config.grid_size
+            end = int(track_cells[slot, track_len[slot] - 1 if self._afrom_end[action] else 0])
+            dx, dy = self._adir[action].tolist()
+            x, y = end % grid_size + dx, end // grid_size + dy
             
             # Check bounds
-            if not (0 <= to_pos.x < self.config.grid_size and 0 <= to_pos.y < self.config.grid_size):
+            if not (0 <= x < self.config.grid_size and 0 <= y < self.config.grid_size):
                 return {"action": "none"}
-                
-            return {
+            
+            return {"action": "extend_line", "line_id": lines[slot].line_id, "to": (x, y)}
+        
+        return {"action": "none"}
+        
+    def action_index(self, action_dict: Dict[str, Any]) -> int:
+        """Convert an action dictionary (e.g. from get_valid_actions) to its discrete index.
+        
+        Returns 0 ('none') if the action has no discrete equivalent.
+        """
+        kind = action_dict["action"]
+        if kind in ("extend_line", "remove_line"):
+            # Action dicts name lines by id, discrete actions by list slot
+            lines = self.env.engine.state.lines
+            slot = next((i for i, line in enumerate(lines)
+                         if line.line_id == action_dict["line_id"]), None)
+            if slot is None:
+                return 0
+            action_dict = {**action_dict, "line_id": slot}
+        
+        if kind == "extend_line" and "to" in action_dict:
+            # Express the target tile relative to the line end it touches
+            tracks = lines[slot].tracks
+            to_pos = Position(*action_dict["to"])
+            from_end = tracks[-1].is_adjacent(to_pos)
+            end = tracks[-1] if from_end else tracks[0]
+            action_dict = {
                 "action": "extend_line",
-                "line_id": line_id,
-                "to": to_pos.to_tuple()
+                "line_id": slot,
+                "from_end": from_end,
+                "direction": (to_pos.x - end.x, to_pos.y - end.y),
             }
-            
-        return action_dict
+        return self._action_reverse.get(_action_key(action_dict), 0)
         
-    def _convert_observation(self, obs: Dict[str, Any]) -> Dict[str, np.ndarray]:
-        """Convert environment observation to gym observation format."""
+    def _convert_observation(self) -> Union[Dict[str, np.ndarray], np.ndarray]:
+        """Convert the engine's current state to gym observation format.
+        
+        Reads the engine arrays directly (never its observation dict), writes
+        into the preallocated buffers and returns the same object (dict, or
+        flat vector with flat_obs) every call.
+        """
         grid_size = self.config.grid_size
         max_lines = self.config.max_lines
+        gym_obs = self._obs
         
-        # Convert grid to numeric format
-        grid = np.zeros((grid_size, grid_size), dtype=np.int32)
-        for y in range(grid_size):
-            for x in range(grid_size):
-                tile = obs["grid"][y][x]
-                if tile == "circle":
-                    grid[y, x] = 1
-                elif tile == "square":
-                    grid[y, x] = 2
-                elif tile == "triangle":
-                    grid[y, x] = 3
-                else:
-                    grid[y, x] = 0
+        engine = self.env.engine
+        state = engine.state
+        
+        # Stations are only ever appended, so copy just the new tiles' codes
+        positions = engine.station_positions
+        if len(positions) != self._grid_stations:
+            new = positions[self._grid_stations:]
+            self._grid_buf[new[:, 1], new[:, 0]] = state.grid[new[:, 1], new[:, 0]]
+            self._grid_stations = len(positions)
                     
-        # Convert passengers to 3D array
-        passengers = np.zeros((grid_size, grid_size, 3), dtype=np.int32)
-        for pos_tuple, passenger_dict in obs["passengers"].items():
-            x, y = pos_tuple
-            passengers[y, x, 0] = passenger_dict.get("circle", 0)
-            passengers[y, x, 1] = passenger_dict.get("square", 0)
-            passengers[y, x, 2] = passenger_dict.get("triangle", 0)
-            
-        # Convert lines to fixed-size arrays
-        lines = np.zeros((max_lines, grid_size*grid_size + 2 + 3), dtype=np.int32)
-        for i, line_data in enumerate(obs["lines"][:max_lines]):
-            # Encode tracks as flattened positions
-            for j, track in enumerate(line_data["tracks"][:grid_size*grid_size]):
-                if isinstance(track, tuple):
-                    x, y = track
-                else:
-                    x, y = track.x, track.y
-                lines[i, j] = y * grid_size + x
-                
-            # Encode train position
-            if line_data["train_pos"]:
-                if isinstance(line_data["train_pos"], tuple):
-                    tx, ty = line_data["train_pos"]
-                else:
-                    tx, ty = line_data["train_pos"].x, line_data["train_pos"].y
-                lines[i, grid_size*grid_size] = ty * grid_size + tx
-                
-            # Encode train passengers
-            train_passengers = line_data["train_passengers"]
-            lines[i, grid_size*grid_size + 1] = len(train_passengers)
-            
-            # Count passengers by type
-            passenger_counts = [0, 0, 0]
-            for passenger in train_passengers:
-                if hasattr(passenger, 'destination_type'):
-                    if passenger.destination_type == StationType.CIRCLE:
-                        passenger_counts[0] += 1
-                    elif passenger.destination_type == StationType.SQUARE:
-                        passenger_counts[1] += 1
-                    elif passenger.destination_type == StationType.TRIANGLE:
-                        passenger_counts[2] += 1
-            
-            lines[i, grid_size*grid_size + 2:grid_size*grid_size + 5] = passenger_counts
-            
-        return {
-            "grid": grid,
-            "passengers": passengers,
-            "lines": lines,
-            "timestep": np.array(obs["timestep"], dtype=np.int32),
-            "score": np.array(obs["score"], dtype=np.float32),
-            "game_over": np.array(1 if obs["game_over"] else 0, dtype=np.int32),
-        }
+        # Passengers come from the engine's (grid, grid, type) tensor and lines
+        # from its array mirror: track rows masked past their length, then
+        # train cell, load and load per type
+        n_cells = grid_size * grid_size
+        lines = gym_obs["lines"]
+        n_lines, track_cells, track_len, train_idx, train_cargo = engine.line_arrays()
+        n = min(n_lines, max_lines)
+        if NUMBA_AVAILABLE:
+            pack_obs(n, track_cells, track_len, train_idx, train_cargo,
+                     engine.passengers_grid.reshape(n_cells, 3),
+                     gym_obs["passengers"].reshape(n_cells, 3), lines)
+        else:
+            self._pack_obs_numpy(n, track_cells, track_len, train_idx, train_cargo)
+        
+        gym_obs["timestep"][...] = state.timestep
+        gym_obs["score"][...] = state.score
+        gym_obs["game_over"][...] = state.game_over
+        return self._obs_out
+    
+    def _pack_obs_numpy(self, n: int, track_cells: np.ndarray, track_len: np.ndarray,
+                        train_idx: np.ndarray, train_cargo: np.ndarray):
+        """NumPy version of kernels.pack_obs, used when numba is not installed."""
+        gym_obs = self._obs
+        n_cells = len(self._cell_range)
+        lines = gym_obs["lines"]
+        np.copyto(gym_obs["passengers"], self.env.engine.passengers_grid)
+        np.multiply(track_cells[:n], self._cell_range < track_len[:n, None], out=lines[:n, :n_cells])
+        lines[:n, n_cells] = track_cells[np.arange(n), train_idx[:n]]
+        lines[:n, n_cells + 1] = train_cargo[:n].sum(axis=1)
+        lines[:n, n_cells + 2:n_cells + 5] = train_cargo[:n]
+        lines[n:] = 0
         
     def reset(
         self,
         seed: Optional[int] = None,
         options: Optional[Dict[str, Any]] = None,
-    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    ) -> Tuple[Union[Dict[str, np.ndarray], np.ndarray], Dict[str, Any]]:
         """Reset the environment."""
         super().reset(seed=seed)
         
+        if options is not None and "skip_obs" in options:
+            self._skip_obs = bool(options["skip_obs"])
+        
         if seed is not None:
             np.random.seed(seed)
+            self.env.engine.seed(seed)
             
-        obs = self.env.reset()
-        self._state = obs
+        self.env.engine.reset()
+        self._grid_buf.fill(0)
+        self._grid_stations = 0
         self._info = {}
         
-        return self._convert_observation(obs), self._info
+        return self._convert_observation(), self._info
         
     def step(
         self, action: int
-    ) -> Tuple[Dict[str, np.ndarray], float, bool, bool, Dict[str, Any]]:
+    ) -> Tuple[Union[Dict[str, np.ndarray], np.ndarray], float, bool, bool, Dict[str, Any]]:
         """Execute one step in the environment."""
         # Convert discrete action to action dictionary
         action_dict = self._convert_action(action)
         
-        # Execute action
-        obs, reward, terminated, info = self.env.step(action_dict)
+        # Execute action; the engine's observation dict is never built here
+        _, reward, terminated, info = self.env.step_without_obs(action_dict)
         
-        self._state = obs
         self._info = info
         
-        # Convert observation
-        gym_obs = self._convert_observation(obs)
+        # Convert observation, unless nobody is going to read it
+        gym_obs = self._obs_out if self._skip_obs else self._convert_observation()
         
         # Gymnasium API requires terminated and truncated separately
         truncated = False  # This game doesn't truncate, only terminates
         
         return gym_obs, reward, terminated, truncated, info
         
+    @contextmanager
+    def no_obs(self) -> Iterator["MinimetroGymEnv"]:
+        """Skip observation conversion in step() for the duration of the block.
+        
+        The observation dict is brought up to date again on exit.
+        """
+        previous = self._skip_obs
+        self._skip_obs = True
+        try:
+            yield self
+        finally:
+            self._skip_obs = previous
+            if not previous:
+                self._convert_observation()
+        
     def render(self) -> Optional[Union[np.ndarray, str]]:
         """Render the environment."""
         if self.render_mode == "text":
@@ -0,0 +1,338 @@
+"""
+Pure-functional MinimetroRL for JAX.
+
+Follows the gymnax layout: the environment object only holds static shapes,
+all game state lives in an EnvState of arrays, and reset/step are pure
+functions of (key, state, action, params) that can be wrapped in jax.jit and
+jax.vmap to roll out many envs on an accelerator in one compiled program.
+
+Requires jax (pip install minimetro-rl[jax]); the rest of the package does
+not import this module.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import jax
+import jax.numpy as jnp
+
+from .config import GameConfig, RewardConfig
+from .gym_env import (ACTION_CREATE, ACTION_EXTEND, ACTION_REMOVE, build_action_table,
+                      make_action_space)
+
+
+class EnvState(NamedTuple):
+    grid: jnp.ndarray          # int8[G*G], tile code per cell
+    passengers: jnp.ndarray    # int32[G*G, 3], waiting passengers per destination type
+    n_stations: jnp.ndarray    # int32
+    tracks: jnp.ndarray        # int32[L, G*G], flat cells of each line, padded
+    track_len: jnp.ndarray     # int32[L]
+    n_lines: jnp.ndarray       # int32
+    train_idx: jnp.ndarray     # int32[L], train position along its line
+    train_dir: jnp.ndarray     # int32[L], +1 or -1
+    train_pax: jnp.ndarray     # int32[L, 3], train load per destination type
+    timestep: jnp.ndarray      # int32
+    score: jnp.ndarray         # float32
+    overflow: jnp.ndarray      # bool
+    game_over: jnp.ndarray     # bool
+
+
+class EnvParams(NamedTuple):
+    station_spawn_rate: int = 100
+    passenger_spawn_rate: int = 50
+    train_capacity: int = 6
+    station_capacity: int = 10
+    max_timesteps: int = 10000
+    passenger_delivered: float = 10.0
+    time_penalty: float = -1.0
+    game_over_penalty: float = -100.0
+
+
+class MinimetroJax:
+    """
+    Functional MinimetroRL environment.
+
+    Actions use the discrete layout of MinimetroGymEnv and observations the
+    same dict of arrays, with extend_line/remove_line addressing lines by
+    their current index as in MinimetroVectorEnv. step auto-resets envs
+    whose episode has ended.
+    """
+
+    def __init__(self, config: Optional[GameConfig] = None,
+                 reward_config: Optional[RewardConfig] = None):
+        self.config = config or GameConfig()
+        self.reward_config = reward_config or RewardConfig()
+        self.grid_size = self.config.grid_size
+        self.n_cells = self.grid_size * self.grid_size
+        self.max_lines = self.config.max_lines
+        self.max_stations = self.config.max_stations
+
+        kind, from_xy, to_xy, line_id, from_end, direction = build_action_table(
+            self.grid_size, self.max_lines)
+        self._akind = jnp.asarray(kind, dtype=jnp.int32)
+        self._afrom = jnp.asarray(from_xy[:, 1] * self.grid_size + from_xy[:, 0], dtype=jnp.int32)
+        self._ato = jnp.asarray(to_xy[:, 1] * self.grid_size + to_xy[:, 0], dtype=jnp.int32)
+        self._aline = jnp.asarray(line_id, dtype=jnp.int32)
+        self._afrom_end = jnp.asarray(from_end)
+        self._adir = jnp.asarray(direction, dtype=jnp.int32)
+
+    @property
+    def default_params(self) -> EnvParams:
+        config, reward_config = self.config, self.reward_config
+        return EnvParams(
+            station_spawn_rate=config.station_spawn_rate,
+            passenger_spawn_rate=config.passenger_spawn_rate,
+            train_capacity=config.train_capacity,
+            station_capacity=config.station_capacity,
+            max_timesteps=config.max_timesteps,
+            passenger_delivered=float(reward_config.passenger_delivered),
+            time_penalty=float(reward_config.time_penalty),
+            game_over_penalty=float(reward_config.game_over_penalty),
+        )
+
+    @property
+    def num_actions(self) -> int:
+        """Number of entries in the action table.
+
+        This is smaller than action_space_n, the size of the MinimetroGymEnv
+        Discrete space; the indices in between are treated as 'none'.
+        """
+        return int(self._akind.shape[0])
+
+    @property
+    def action_space_n(self) -> int:
+        return int(make_action_space(self.config).n)
+
+    def reset(self, key: jax.Array, params: Optional[EnvParams] = None
+              ) -> Tuple[Dict[str, jnp.ndarray], EnvState]:
+        state = self.reset_env(key, params)
+        return self.get_obs(state), state
+
+    def reset_env(self, key: jax.Array, params: Optional[EnvParams] = None) -> EnvState:
+        """Empty grid with no lines; the first station spawns on the first step."""
+        n_cells, max_lines = self.n_cells, self.max_lines
+        return EnvState(
+            grid=jnp.zeros(n_cells, dtype=jnp.int8),
+            passengers=jnp.zeros((n_cells, 3), dtype=jnp.int32),
+            n_stations=jnp.int32(0),
+            tracks=jnp.zeros((max_lines, n_cells), dtype=jnp.int32),
+            track_len=jnp.zeros(max_lines, dtype=jnp.int32),
+            n_lines=jnp.int32(0),
+            train_idx=jnp.zeros(max_lines, dtype=jnp.int32),
+            train_dir=jnp.ones(max_lines, dtype=jnp.int32),
+            train_pax=jnp.zeros((max_lines, 3), dtype=jnp.int32),
+            timestep=jnp.int32(0),
+            score=jnp.float32(0.0),
+            overflow=jnp.bool_(False),
+            game_over=jnp.bool_(False),
+        )
+
+    def step(self, key: jax.Array, state: EnvState, action: jnp.ndarray,
+             params: Optional[EnvParams] = None
+             ) -> Tuple[Dict[str, jnp.ndarray], EnvState, jnp.ndarray, jnp.ndarray, Dict[str, Any]]:
+        """Step the env and reset it in the same call once the episode ends."""
+        params = params or self.default_params
+        key_step, key_reset = jax.random.split(key)
+        state_st, reward, done, info = self.step_env(key_step, state, action, params)
+        state_re = self.reset_env(key_reset, params)
+        state = jax.tree_util.tree_map(lambda r, s: jnp.where(done, r, s), state_re, state_st)
+        return self.get_obs(state), state, reward, done, info
+
+    def step_env(self, key: jax.Array, state: EnvState, action: jnp.ndarray, params: EnvParams
+                 ) -> Tuple[EnvState, jnp.ndarray, jnp.ndarray, Dict[str, Any]]:
+        """One game step, following GameEngine.step."""
+        key_cell, key_type, key_dest = jax.random.split(key, 3)
+        state = self._apply_action(state, action)
+        state, delivered = self._tick_trains(state, params)
+        reward = params.time_penalty + delivered * params.passenger_delivered
+        state = self._spawn_station(key_cell, key_type, state, params)
+        state = self._generate_passengers(key_dest, state, params)
+
+        timestep = state.timestep + 1
+        score = state.score + reward
+        done = (timestep >= params.max_timesteps) | state.overflow
+        reward = reward + jnp.where(done, params.game_over_penalty, 0.0)
+        state = state._replace(timestep=timestep, score=score, game_over=done)
+        return state, reward.astype(jnp.float32), done, {"delivered_passengers": delivered}
+
+    def _apply_action(self, state: EnvState, action: jnp.ndarray) -> EnvState:
+        grid_size, n_cells, max_lines = self.grid_size, self.n_cells, self.max_lines
+        # Indices past the action table (the gym Discrete space is larger) are 'none'
+        in_table = (action >= 0) & (action < self.num_actions)
+        action = jnp.where(in_table, action, 0)
+        kind = self._akind[action]
+        rows = jnp.arange(max_lines)
+        cols = jnp.arange(n_cells)
+
+        # create_line: new two-tile line in the first free row
+        create = (kind == ACTION_CREATE) & (state.n_lines < max_lines)
+        new_row = jnp.zeros(n_cells, jnp.int32).at[0].set(self._afrom[action]).at[1].set(self._ato[action])
+        is_new = create & (rows == state.n_lines)
+        tracks = jnp.where(is_new[:, None], new_row, state.tracks)
+        track_len = jnp.where(is_new, 2, state.track_len)
+        train_idx = jnp.where(is_new, 0, state.train_idx)
+        train_dir = jnp.where(is_new, 1, state.train_dir)
+        train_pax = jnp.where(is_new[:, None], 0, state.train_pax)
+        n_lines = state.n_lines + create
+
+        # extend_line: step off the chosen end, then attach like Line.add_track
+        line = self._aline[action]
+        row = tracks[line]
+        length = track_len[line]
+        head = row[0]
+        tail = row[jnp.maximum(length - 1, 0)]
+        end = jnp.where(self._afrom_end[action], tail, head)
+        x = end % grid_size + self._adir[action, 0]
+        y = end // grid_size + self._adir[action, 1]
+        cell = y * grid_size + x
+        on_line = jnp.any((row == cell) & (cols < length))
+        extend = ((kind == ACTION_EXTEND) & (line < n_lines)
+                  & (x >= 0) & (x < grid_size) & (y >= 0) & (y < grid_size) & ~on_line)
+        prepend = extend & _adjacent(head, cell, grid_size)
+        append = extend & ~prepend & _adjacent(tail, cell, grid_size)
+        row_prepended = jnp.concatenate([cell[None], row[:-1]])
+        row_appended = jnp.where(cols == length, cell, row)
+        row = jnp.where(prepend, row_prepended, jnp.where(append, row_appended, row))
+        tracks = tracks.at[line].set(row)
+        track_len = track_len.at[line].add((prepend | append).astype(jnp.int32))
+        train_idx = train_idx.at[line].add(prepend.astype(jnp.int32))
+
+        # remove_line: shift the later lines down, like list.remove
+        remove = (kind == ACTION_REMOVE) & (line < n_lines)
+        src = jnp.where(remove & (rows >= line), jnp.minimum(rows + 1, max_lines - 1), rows)
+        n_lines = n_lines - remove
+        active = rows < n_lines
+        tracks = tracks[src]
+        track_len = jnp.where(active, track_len[src], 0)
+        train_idx = train_idx[src]
+        train_dir = train_dir[src]
+        train_pax = jnp.where(active[:, None], train_pax[src], 0)
+
+        return state._replace(tracks=tracks, track_len=track_len, n_lines=n_lines,
+                              train_idx=train_idx, train_dir=train_dir, train_pax=train_pax)
+
+    def _tick_trains(self, state: EnvState, params: EnvParams) -> Tuple[EnvState, jnp.ndarray]:
+        """Move every train one tile, then drop off and pick up passengers."""
+        cols = jnp.arange(self.n_cells)
+        active = (jnp.arange(self.max_lines) < state.n_lines) & (state.track_len > 0)
+
+        next_idx = state.train_idx + state.train_dir
+        bounce_start = next_idx < 0
+        bounce_end = next_idx >= state.track_len
+        train_dir = jnp.where(bounce_start, 1, jnp.where(bounce_end, -1, state.train_dir))
+        next_idx = jnp.where(bounce_start, 1, jnp.where(bounce_end, state.track_len - 2, next_idx))
+        train_idx = jnp.where(active, next_idx, state.train_idx)
+        train_dir = jnp.where(active, train_dir, state.train_dir)
+
+        # line_types[l, c]: station type c has a stop on line l
+        on_track = cols[None, :] < state.track_len[:, None]
+        codes = state.grid[state.tracks].astype(jnp.int32)
+        line_types = jnp.stack([jnp.any(on_track & (codes == c + 1), axis=1) for c in range(3)], axis=1)
+
+        # Lines share the waiting passengers, so serve them one after another
+        def serve(l, carry):
+            passengers, train_pax, delivered = carry
+            cell = state.tracks[l, train_idx[l]]
+            col = state.grid[cell].astype(jnp.int32) - 1
+            at_station = active[l] & (col >= 0)
+            cargo = train_pax[l]
+
+            drop = jnp.where(at_station & (jnp.arange(3) == col), cargo, 0)
+            delivered = delivered + drop.sum()
+            cargo = cargo - drop
+
+            waiting = passengers[cell]
+            load = cargo.sum()
+            for c in range(3):
+                take = jnp.where(at_station & (c != col) & line_types[l, c],
+                                 jnp.minimum(params.train_capacity - load, waiting[c]), 0)
+                take = jnp.maximum(take, 0)
+                waiting = waiting.at[c].add(-take)
+                cargo = cargo.at[c].add(take)
+                load = load + take
+
+            return passengers.at[cell].set(waiting), train_pax.at[l].set(cargo), delivered
+
+        passengers, train_pax, delivered = jax.lax.fori_loop(
+            0, self.max_lines, serve, (state.passengers, state.train_pax, jnp.int32(0)))
+
+        state = state._replace(passengers=passengers, train_idx=train_idx,
+                               train_dir=train_dir, train_pax=train_pax)
+        return state, delivered
+
+    def _spawn_station(self, key_cell: jax.Array, key_type: jax.Array, state: EnvState,
+                       params: EnvParams) -> EnvState:
+        """Place a station of random type on a random free tile."""
+        free = state.grid == 0
+        spawn = ((state.timestep % params.station_spawn_rate == 0)
+                 & (state.n_stations < self.max_stations) & jnp.any(free))
+        cell = jax.random.categorical(key_cell, jnp.where(free, 0.0, -jnp.inf))
+        code = jax.random.randint(key_type, (), 1, 4).astype(jnp.int8)
+        grid = jnp.where(spawn, state.grid.at[cell].set(code), state.grid)
+        return state._replace(grid=grid, n_stations=state.n_stations + spawn)
+
+    def _generate_passengers(self, key_dest: jax.Array, state: EnvState,
+                             params: EnvParams) -> EnvState:
+        """One new passenger per station below capacity, heading to another type."""
+        own = state.grid.astype(jnp.int32) - 1
+        totals = state.passengers.sum(axis=1)
+        eligible = ((state.timestep % params.passenger_spawn_rate == 0)
+                    & (own >= 0) & (totals < params.station_capacity))
+        dest = jax.random.randint(key_dest, own.shape, 0, 2)
+        dest = dest + (dest >= own)
+        passengers = state.passengers + (jax.nn.one_hot(dest, 3, dtype=jnp.int32)
+                                         * eligible[:, None])
+        overflow = state.overflow | jnp.any(eligible & (totals + 1 >= params.station_capacity))
+        return state._replace(passengers=passengers, overflow=overflow)
+
+    def get_obs(self, state: EnvState) -> Dict[str, jnp.ndarray]:
+        """Observation dict in the MinimetroGymEnv layout."""
+        grid_size, n_cells = self.grid_size, self.n_cells
+        active = jnp.arange(self.max_lines) < state.n_lines
+        on_track = active[:, None] & (jnp.arange(n_cells)[None, :] < state.track_len[:, None])
+        train_cell = jnp.take_along_axis(state.tracks, state.train_idx[:, None], axis=1)
+        train_pax = jnp.where(active[:, None], state.train_pax, 0)
+        lines = jnp.concatenate([
+            jnp.where(on_track, state.tracks, 0),
+            jnp.where(active[:, None], train_cell, 0),
+            train_pax.sum(axis=1, keepdims=True),
+            train_pax,
+        ], axis=1)
+        return {
+            "grid": state.grid.astype(jnp.int32).reshape(grid_size, grid_size),
+            "passengers": state.passengers.reshape(grid_size, grid_size, 3),
+            "lines": lines,
+            "timestep": state.timestep,
+            "score": state.score,
+            "game_over": state.game_over.astype(jnp.int32),
+        }
+
+    def random_rollout(self, key: jax.Array, num_envs: int, num_steps: int,
+                       params: Optional[EnvParams] = None
+                       ) -> Tuple[EnvState, jnp.ndarray, jnp.ndarray]:
+        """Roll out num_envs envs with uniform random actions for num_steps steps.
+
+        Returns the final states and the (num_steps, num_envs) rewards and dones.
+        Wrap in jax.jit with num_envs and num_steps static to compile it once.
+        """
+        params = params or self.default_params
+        key, key_reset = jax.random.split(key)
+        state = jax.vmap(self.reset_env, in_axes=(0, None))(
+            jax.random.split(key_reset, num_envs), params)
+        step = jax.vmap(self.step, in_axes=(0, 0, 0, None))
+
+        def body(carry, _):
+            key, state = carry
+            key, key_act, key_step = jax.random.split(key, 3)
+            action = jax.random.randint(key_act, (num_envs,), 0, self.num_actions)
+            _, state, reward, done, _ = step(jax.random.split(key_step, num_envs),
+                                             state, action, params)
+            return (key, state), (reward, done)
+
+        (_, state), (rewards, dones) = jax.lax.scan(body, (key, state), None, length=num_steps)
+        return state, rewards, dones
+
+
+def _adjacent(a: jnp.ndarray, b: jnp.ndarray, grid_size: int) -> jnp.ndarray:
+    dx = a % grid_size - b % grid_size
+    dy = a // grid_size - b // grid_size
+    return dx * dx + dy * dy == 1
@@ -0,0 +1,324 @@
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional, the engine falls back to its Python path
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def tick_trains(n_lines, track_cells, track_len, train_idx, train_dir, train_cargo,
+                line_types, grid_flat, station_at, cell_pass, capacity, visited):
+    """Move every train one tile, then drop off and pick up passengers.
+
+    Tracks are stored as flat cell indices (y * grid_size + x), one padded row per
+    line, and line_types[l, c] flags whether station type c has a stop on line l.
+    cell_pass holds waiting passengers per cell and destination type.
+    train_idx, train_dir, train_cargo and cell_pass are updated in place;
+    visited[l] receives the station row line l stopped at, or -1.
+    Returns the number of delivered passengers.
+    """
+    for l in range(n_lines):
+        length = track_len[l]
+        if length == 0:
+            continue
+        if train_idx[l] < 0:
+            # Train lost its tile: put it back at the start of the line
+            train_idx[l] = 0
+            continue
+
+        next_idx = train_idx[l] + train_dir[l]
+        if next_idx < 0:
+            train_dir[l] = 1
+            next_idx = 1
+        elif next_idx >= length:
+            train_dir[l] = -1
+            next_idx = length - 2
+
+        if 0 <= next_idx < length:
+            train_idx[l] = next_idx
+
+    delivered = 0
+    for l in range(n_lines):
+        visited[l] = -1
+        if track_len[l] == 0:
+            continue
+
+        cell = track_cells[l, train_idx[l]]
+        s = station_at[cell]
+        if s < 0:
+            continue
+        visited[l] = s
+
+        # Drop off passengers whose destination is this station's type
+        col = grid_flat[cell] - 1
+        delivered += train_cargo[l, col]
+        train_cargo[l, col] = 0
+
+        # Pick up passengers heading to any other station type on this line
+        load = 0
+        for c in range(3):
+            load += train_cargo[l, c]
+        for c in range(3):
+            if c == col or not line_types[l, c]:
+                continue
+            while load < capacity and cell_pass[cell, c] > 0:
+                cell_pass[cell, c] -= 1
+                train_cargo[l, c] += 1
+                load += 1
+
+    return delivered
+
+
+@njit(cache=True)
+def pack_obs(n_lines, track_cells, track_len, train_idx, train_cargo, cell_pass,
+             out_passengers, out_lines):
+    """Write the passenger and line fields of a MinimetroGymEnv observation.
+
+    cell_pass and out_passengers are (n_cells, 3); out_lines rows hold the
+    track cells, then the train cell, the train load and the load per
+    destination type. Rows from n_lines on are zeroed.
+    """
+    n_cells = cell_pass.shape[0]
+    for c in range(n_cells):
+        for t in range(3):
+            out_passengers[c, t] = cell_pass[c, t]
+
+    for l in range(out_lines.shape[0]):
+        for j in range(out_lines.shape[1]):
+            out_lines[l, j] = 0
+        if l >= n_lines:
+            continue
+        for j in range(track_len[l]):
+            out_lines[l, j] = track_cells[l, j]
+        out_lines[l, n_cells] = track_cells[l, train_idx[l]]
+        load = 0
+        for t in range(3):
+            out_lines[l, n_cells + 2 + t] = train_cargo[l, t]
+            load += train_cargo[l, t]
+        out_lines[l, n_cells + 1] = load
+
+
+# Batched kernels for MinimetroVectorEnv. Every array has the env index as its
+# leading axis; grids and per-cell arrays are flattened to y * grid_size + x.
+# Action kinds match src.gym_env: 1 create, 2 extend, 3 remove.
+
+@njit(cache=True)
+def reset_env(e, grid, passengers, station_at, n_stations, free_cells, n_free,
+              n_lines, timestep, score, game_over, overflow):
+    """Put env e back into its initial empty state."""
+    n_cells = grid.shape[1]
+    for c in range(n_cells):
+        grid[e, c] = 0
+        station_at[e, c] = -1
+        free_cells[e, c] = c
+        for t in range(passengers.shape[2]):
+            passengers[e, c, t] = 0
+    n_free[e] = n_cells
+    n_stations[e] = 0
+    n_lines[e] = 0
+    timestep[e] = 0
+    score[e] = 0.0
+    game_over[e] = False
+    overflow[e] = False
+
+
+@njit(cache=True)
+def _cells_adjacent(a, b, grid_size):
+    dx = a % grid_size - b % grid_size
+    dy = a // grid_size - b // grid_size
+    return dx * dx + dy * dy == 1
+
+
+# Compiled batch_step kernels by (grid_size, max_lines)
+_BATCH_STEP_KERNELS = {}
+
+
+def make_batch_step(grid_size, max_lines):
+    """Return the batch_step kernel for one (grid_size, max_lines) pair.
+
+    numba freezes the ints a kernel closes over as compile-time constants, so
+    the cell index divisions and line bounds compile against fixed values
+    instead of arguments. Kernels are built once per pair and process.
+    """
+    key = (grid_size, max_lines)
+    if key in _BATCH_STEP_KERNELS:
+        return _BATCH_STEP_KERNELS[key]
+
+    @njit(parallel=True, cache=True)
+    def batch_step(actions, autoreset, akind, afrom, ato, aline, afrom_end, adir,
+                   grid, passengers, station_at, station_cells, station_type, n_stations,
+                   free_cells, n_free, tracks, track_len, n_lines, train_idx, train_dir,
+                   train_cargo, line_types, visited, timestep, score, game_over, overflow,
+                   cell_draw, type_draw, dest_draw, max_stations,
+                   station_spawn_rate, passenger_spawn_rate, station_capacity,
+                   train_capacity, max_timesteps, time_penalty, delivered_reward,
+                   game_over_penalty, rewards):
+        """Advance every env by one step, following GameEngine.step.
+
+        Envs flagged in autoreset are reset instead and get a zero reward. Random
+        choices come pre-drawn: cell_draw[e] in [0, 1) picks the spawn tile,
+        type_draw[e] the station type and dest_draw[e, s] the destination slot for
+        station s (shifted past the station's own type).
+        """
+        n_actions = akind.shape[0]
+        for e in prange(actions.shape[0]):
+            if autoreset[e]:
+                reset_env(e, grid, passengers, station_at, n_stations, free_cells, n_free,
+                          n_lines, timestep, score, game_over, overflow)
+                rewards[e] = 0.0
+                continue
+            if game_over[e]:
+                rewards[e] = 0.0
+                continue
+
+            reward = time_penalty
+            a = actions[e]
+            kind = akind[a] if 0 <= a < n_actions else 0
+
+            if kind == 1 and n_lines[e] < max_lines:
+                # create_line: new two-tile line with its train at the first tile
+                l = n_lines[e]
+                c0 = afrom[a, 1] * grid_size + afrom[a, 0]
+                c1 = ato[a, 1] * grid_size + ato[a, 0]
+                tracks[e, l, 0] = c0
+                tracks[e, l, 1] = c1
+                track_len[e, l] = 2
+                train_idx[e, l] = 0
+                train_dir[e, l] = 1
+                for t in range(3):
+                    train_cargo[e, l, t] = 0
+                    line_types[e, l, t] = False
+                for c in (c0, c1):
+                    if grid[e, c] > 0:
+                        line_types[e, l, grid[e, c] - 1] = True
+                n_lines[e] += 1
+
+            elif kind == 2 and aline[a] < n_lines[e]:
+                # extend_line: step off the chosen end, then attach like Line.add_track
+                l = aline[a]
+                length = track_len[e, l]
+                head = tracks[e, l, 0]
+                tail = tracks[e, l, length - 1]
+                end = tail if afrom_end[a] else head
+                x = end % grid_size + adir[a, 0]
+                y = end // grid_size + adir[a, 1]
+                if 0 <= x < grid_size and 0 <= y < grid_size:
+                    c = y * grid_size + x
+                    on_line = False
+                    for j in range(length):
+                        if tracks[e, l, j] == c:
+                            on_line = True
+                            break
+                    added = False
+                    if not on_line:
+                        if _cells_adjacent(head, c, grid_size):
+                            for j in range(length, 0, -1):
+                                tracks[e, l, j] = tracks[e, l, j - 1]
+                            tracks[e, l, 0] = c
+                            train_idx[e, l] += 1
+                            added = True
+                        elif _cells_adjacent(tail, c, grid_size):
+                            tracks[e, l, length] = c
+                            added = True
+                    if added:
+                        track_len[e, l] = length + 1
+                        if grid[e, c] > 0:
+                            line_types[e, l, grid[e, c] - 1] = True
+
+            elif kind == 3 and aline[a] < n_lines[e]:
+                # remove_line: shift the later lines down, like list.remove
+                for l in range(aline[a], n_lines[e] - 1):
+                    length = track_len[e, l + 1]
+                    for j in range(length):
+                        tracks[e, l, j] = tracks[e, l + 1, j]
+                    track_len[e, l] = length
+                    train_idx[e, l] = train_idx[e, l + 1]
+                    train_dir[e, l] = train_dir[e, l + 1]
+                    for t in range(3):
+                        train_cargo[e, l, t] = train_cargo[e, l + 1, t]
+                        line_types[e, l, t] = line_types[e, l + 1, t]
+                n_lines[e] -= 1
+
+            delivered = tick_trains(n_lines[e], tracks[e], track_len[e], train_idx[e],
+                                    train_dir[e], train_cargo[e], line_types[e], grid[e],
+                                    station_at[e], passengers[e], train_capacity, visited[e])
+            reward += delivered * delivered_reward
+
+            # Spawn a station on a random free tile
+            if (timestep[e] % station_spawn_rate == 0 and n_stations[e] < max_stations
+                    and n_free[e] > 0):
+                i = min(int(cell_draw[e] * n_free[e]), n_free[e] - 1)
+                c = free_cells[e, i]
+                n_free[e] -= 1
+                free_cells[e, i] = free_cells[e, n_free[e]]
+                s = n_stations[e]
+                t = type_draw[e]
+                grid[e, c] = t + 1
+                station_at[e, c] = s
+                station_cells[e, s] = c
+                station_type[e, s] = t
+                n_stations[e] += 1
+                for l in range(n_lines[e]):
+                    for j in range(track_len[e, l]):
+                        if tracks[e, l, j] == c:
+                            line_types[e, l, t] = True
+                            break
+
+            # One new passenger per station below capacity
+            if timestep[e] % passenger_spawn_rate == 0:
+                for s in range(n_stations[e]):
+                    c = station_cells[e, s]
+                    total = passengers[e, c, 0] + passengers[e, c, 1] + passengers[e, c, 2]
+                    if total < station_capacity:
+                        d = dest_draw[e, s]
+                        if d >= station_type[e, s]:
+                            d += 1
+                        passengers[e, c, d] += 1
+                        if total + 1 >= station_capacity:
+                            overflow[e] = True
+
+            timestep[e] += 1
+            score[e] += reward
+            if timestep[e] >= max_timesteps or overflow[e]:
+                game_over[e] = True
+                reward += game_over_penalty
+            rewards[e] = reward
+
+    _BATCH_STEP_KERNELS[key] = batch_step
+    return batch_step
+
+
+@njit(parallel=True, cache=True)
+def batch_pack_obs(grid, passengers, tracks, track_len, n_lines, train_idx, train_cargo,
+                   timestep, score, game_over, out_grid, out_passengers, out_lines,
+                   out_timestep, out_score, out_game_over):
+    """Write the gym observation of every env into the preallocated out_* arrays.
+
+    out_lines rows follow MinimetroGymEnv: track cells, then the train cell,
+    the train load and the load per destination type.
+    """
+    n_cells = grid.shape[1]
+    for e in prange(grid.shape[0]):
+        for c in range(n_cells):
+            out_grid[e, c] = grid[e, c]
+            for t in range(3):
+                out_passengers[e, c, t] = passengers[e, c, t]
+        out_lines[e] = 0
+        for l in range(n_lines[e]):
+            for j in range(track_len[e, l]):
+                out_lines[e, l, j] = tracks[e, l, j]
+            out_lines[e, l, n_cells] = tracks[e, l, train_idx[e, l]]
+            load = 0
+            for t in range(3):
+                out_lines[e, l, n_cells + 2 + t] = train_cargo[e, l, t]
+                load += train_cargo[e, l, t]
+            out_lines[e, l, n_cells + 1] = load
+        out_timestep[e] = timestep[e]
+        out_score[e] = score[e]
+        out_game_over[e] = game_over[e]
@@ -1,7 +1,10 @@
+import numpy as np
 import pygame
+from collections import OrderedDict
 from typing import Dict, Any, Tuple, Optional
 #from minimetro_rl.types import StationType, TileType
 from src.config import GameConfig
+from src.types import STATION_NAMES, StationType, TileType
 
 
 class PygameRenderer:
@@ -29,15 +32,33 @@ class PygameRenderer:
         pygame.display.set_caption("MinimetroRL")
         self.font = pygame.font.Font(None, 24)
         self.clock = pygame.time.Clock()
+        
+        # The grid never changes, so rasterize it once and blit it every frame
+        self._background = pygame.Surface((self.window_width, self.window_height)).convert()
+        self._background.fill(self.colors['background'])
+        self._draw_grid(self._background)
+        
+        # Station shapes are baked into sprites once, indexed by tile code
+        self._station_sprites = [None] + [
+            self._make_station_sprite(STATION_NAMES[station_type]) for station_type in StationType
+        ]
+        
+        # Rendered text keyed by (string, color), least recently used evicted first
+        self._text_cache: 'OrderedDict[Tuple[str, Tuple[int, int, int]], pygame.Surface]' = OrderedDict()
+        self._text_cache_size = 256
+        # Passenger counts come from a small fixed set, render them up front
+        for n in range(1, self.config.station_capacity + 1):
+            self._text(str(n), self.colors['text'])
+        for n in range(1, self.config.train_capacity + 1):
+            self._text(str(n), (255, 255, 255))
     
     def render(self, observation: Dict[str, Any]) -> bool:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
         
-        self.screen.fill(self.colors['background'])
+        self.screen.blit(self._background, (0, 0))
         
-        self._draw_grid()
         self._draw_stations(observation)
         self._draw_lines(observation)
         self._draw_trains(observation)
@@ -48,56 +69,60 @@ class PygameRenderer:
         self.clock.tick(self.config.fps)
         return True
     
-    def _draw_grid(self):
+    def _draw_grid(self, surface: pygame.Surface):
         for x in range(self.config.grid_size + 1):
-            pygame.draw.line(self.screen, self.colors['grid_line'],
+            pygame.draw.line(surface, self.colors['grid_line'],
                            (x * self.cell_size, 0),
                            (x * self.cell_size, self.config.grid_size * self.cell_size))
         
         for y in range(self.config.grid_size + 1):
-            pygame.draw.line(self.screen, self.colors['grid_line'],
+            pygame.draw.line(surface, self.colors['grid_line'],
                            (0, y * self.cell_size),
                            (self.config.grid_size * self.cell_size, y * self.cell_size))
     
     def _draw_stations(self, observation: Dict[str, Any]):
-        grid = observation['grid']
-        for y in range(len(grid)):
-            for x in range(len(grid[y])):
-                if grid[y][x] != 'empty':
-                    self._draw_station(x, y, grid[y][x])
+        grid = np.asarray(observation['grid'])
+        ys, xs = np.nonzero(grid != TileType.EMPTY)
+        sprites = self._station_sprites
+        cs = self.cell_size
+        self.screen.blits(
+            [(sprites[code], (x * cs, y * cs))
+             for x, y, code in zip(xs.tolist(), ys.tolist(), grid[ys, xs].tolist())],
+            doreturn=False,
+        )
     
-    def _draw_station(self, x: int, y: int, station_type: str):
-        center_x = x * self.cell_size + self.cell_size // 2
-        center_y = y * self.cell_size + self.cell_size // 2
+    def _make_station_sprite(self, station_type: str) -> pygame.Surface:
+        sprite = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA).convert_alpha()
+        center_x = self.cell_size // 2
+        center_y = self.cell_size // 2
         size = self.cell_size // 3
         
         color = self.colors[station_type]
         
         if station_type == 'circle':
-            pygame.draw.circle(self.screen, color, (center_x, center_y), size)
+            pygame.draw.circle(sprite, color, (center_x, center_y), size)
         elif station_type == 'square':
             rect = pygame.Rect(center_x - size, center_y - size, size * 2, size * 2)
-            pygame.draw.rect(self.screen, color, rect)
+            pygame.draw.rect(sprite, color, rect)
         elif station_type == 'triangle':
             points = [
                 (center_x, center_y - size),
                 (center_x - size, center_y + size),
                 (center_x + size, center_y + size)
             ]
-            pygame.draw.polygon(self.screen, color, points)
+            pygame.draw.polygon(sprite, color, points)
+        return sprite
     
     def _draw_lines(self, observation: Dict[str, Any]):
+        # One polyline call per line instead of one call per segment
         for i, line_data in enumerate(observation['lines']):
             tracks = line_data['tracks']
             if len(tracks) < 2:
                 continue
             
             color = self._get_line_color(i)
-            
-            for j in range(len(tracks) - 1):
-                start_pos = self._grid_to_screen(tracks[j])
-                end_pos = self._grid_to_screen(tracks[j + 1])
-                pygame.draw.line(self.screen, color, start_pos, end_pos, 4)
+            points = [self._grid_to_screen(track) for track in tracks]
+            pygame.draw.lines(self.screen, color, False, points, 4)
     
     def _draw_trains(self, observation: Dict[str, Any]):
         for line_data in observation['lines']:
@@ -108,22 +133,35 @@ class PygameRenderer:
                 
                 passenger_count = len(line_data['train_passengers'])
                 if passenger_count > 0:
-                    text = self.font.render(str(passenger_count), True, (255, 255, 255))
+                    text = self._text(str(passenger_count), (255, 255, 255))
                     text_rect = text.get_rect(center=train_pos)
                     self.screen.blit(text, text_rect)
     
     def _draw_passengers(self, observation: Dict[str, Any]):
-        passengers = observation['passengers']
-        for pos_tuple, passenger_dict in passengers.items():
-            x, y = pos_tuple
+        totals = observation['passengers'].sum(axis=1).tolist()
+        color = self.colors['text']
+        labels = []
+        for (x, y), total_passengers in zip(observation['station_positions'].tolist(), totals):
             center_x = x * self.cell_size + self.cell_size // 2
             center_y = y * self.cell_size + self.cell_size // 2
             
-            total_passengers = sum(passenger_dict.values())
             if total_passengers > 0:
-                text = self.font.render(str(total_passengers), True, self.colors['text'])
-                text_rect = text.get_rect(center=(center_x, center_y + 25))
-                self.screen.blit(text, text_rect)
+                text = self._text(str(total_passengers), color)
+                labels.append((text, text.get_rect(center=(center_x, center_y + 25))))
+        self.screen.blits(labels, doreturn=False)
+    
+    def _text(self, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """Render text, reusing the surface while the string is unchanged."""
+        key = (text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            surface = self.font.render(text, True, color).convert_alpha()
+            self._text_cache[key] = surface
+            if len(self._text_cache) > self._text_cache_size:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return surface
     
     def _draw_info(self, observation: Dict[str, Any]):
         info_y = self.config.grid_size * self.cell_size + 10
@@ -132,9 +170,9 @@ class PygameRenderer:
         score_text = f"Score: {observation['score']}"
         game_over_text = f"Game Over: {observation['game_over']}"
         
-        timestep_surface = self.font.render(timestep_text, True, self.colors['text'])
-        score_surface = self.font.render(score_text, True, self.colors['text'])
-        game_over_surface = self.font.render(game_over_text, True, self.colors['text'])
+        timestep_surface = self._text(timestep_text, self.colors['text'])
+        score_surface = self._text(score_text, self.colors['text'])
+        game_over_surface = self._text(game_over_text, self.colors['text'])
         
         self.screen.blit(timestep_surface, (10, info_y))
         self.screen.blit(score_surface, (10, info_y + 25))
@@ -1,22 +1,51 @@
+import sys
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple, Optional, Literal
-from enum import Enum
+from typing import Deque, Dict, FrozenSet, List, Set, Tuple, Optional, Literal
+from enum import IntEnum
 
+import numpy as np
 
-class StationType(Enum):
-    CIRCLE = 'circle'
-    SQUARE = 'square'
-    TRIANGLE = 'triangle'
+# dataclass(slots=True) drops the per-instance __dict__ but needs Python 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
 
-class TileType(Enum):
-    EMPTY = 'empty'
-    CIRCLE = 'circle'
-    SQUARE = 'square'
-    TRIANGLE = 'triangle'
+# IntEnum members hash and compare as plain ints, and their values are the
+# tile codes stored in the numpy grid: StationType(code) decodes a station tile
+# and int(station_type) encodes it
+class StationType(IntEnum):
+    CIRCLE = 1
+    SQUARE = 2
+    TRIANGLE = 3
 
 
-@dataclass
+class TileType(IntEnum):
+    EMPTY = 0
+    CIRCLE = 1
+    SQUARE = 2
+    TRIANGLE = 3
+
+
+# Lowercase name of each station type, as used in observations and by the renderers
+STATION_NAMES: Dict[StationType, str] = {st: st.name.lower() for st in StationType}
+# Column of each station type in per-type count arrays
+STATION_INDEX: Dict[StationType, int] = {st: i for i, st in enumerate(StationType)}
+
+
+def pack_position(x: int, y: int) -> int:
+    """Pack grid coordinates into one int key for set/dict lookups."""
+    return x | (y << 16)
+
+
+def packed_adjacent(packed: np.ndarray, key: int) -> np.ndarray:
+    """Mask of the packed positions orthogonally adjacent to the packed key."""
+    packed = np.asarray(packed, dtype=np.int64)
+    dx = (packed & 0xFFFF) - (key & 0xFFFF)
+    dy = (packed >> 16) - (key >> 16)
+    return dx * dx + dy * dy == 1
+
+
+@dataclass(frozen=True, **_SLOTS)
 class Position:
     x: int
     y: int
@@ -38,47 +67,49 @@ class Position:
         return (self.x, self.y)
     
     def is_adjacent(self, other: 'Position') -> bool:
-        dx = abs(self.x - other.x)
-        dy = abs(self.y - other.y)
-        return (dx == 1 and dy == 0) or (dx == 0 and dy == 1)
+        # Integer coordinates: squared distance is 1 only for orthogonal neighbours
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return dx * dx + dy * dy == 1
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Station:
     position: Position
     station_type: StationType
-    passengers: Dict[StationType, int] = field(default_factory=dict)
-    
-    def __post_init__(self):
-        if not self.passengers:
-            self.passengers = {st: 0 for st in StationType}
+    # Waiting passengers per destination, indexed by STATION_INDEX; the engine
+    # hands each station a view of its tile in the shared passenger tensor
+    passengers: np.ndarray = field(default_factory=lambda: np.zeros(len(StationType), dtype=np.int32))
+    capacity: int = 10  # GameConfig.station_capacity
     
     def total_passengers(self) -> int:
-        return sum(self.passengers.values())
+        return int(self.passengers.sum())
     
     def add_passenger(self, destination: StationType) -> bool:
         if destination == self.station_type:
             return False
-        if self.total_passengers() >= 10:
+        if self.total_passengers() >= self.capacity:
             return False
-        self.passengers[destination] += 1
+        self.passengers[STATION_INDEX[destination]] += 1
         return True
     
     def remove_passengers(self, destination: StationType, count: int) -> int:
-        available = self.passengers[destination]
-        removed = min(available, count)
-        self.passengers[destination] -= removed
+        i = STATION_INDEX[destination]
+        removed = min(int(self.passengers[i]), count)
+        self.passengers[i] -= removed
         return removed
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Train:
     position: Position
     passengers: List[StationType] = field(default_factory=list)
     direction: int = 1
+    track_idx: int = 0  # index of position in the owning line's tracks
+    capacity: int = 6  # GameConfig.train_capacity
     
     def has_capacity(self) -> bool:
-        return len(self.passengers) < 6
+        return len(self.passengers) < self.capacity
     
     def add_passenger(self, passenger_type: StationType) -> bool:
         if not self.has_capacity():
@@ -87,53 +118,72 @@ class Train:
         return True
     
     def remove_passengers(self, destination: StationType) -> int:
-        passengers_to_remove = [p for p in self.passengers if p == destination]
-        for p in passengers_to_remove:
-            self.passengers.remove(p)
-        return len(passengers_to_remove)
+        count = self.passengers.count(destination)
+        if count:
+            self.passengers = [p for p in self.passengers if p != destination]
+        return count
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Line:
     line_id: int
-    tracks: List[Position] = field(default_factory=list)
+    # A deque so that extending from the head is O(1) like extending the tail
+    tracks: Deque[Position] = field(default_factory=deque)
     train: Optional[Train] = None
+    train_capacity: int = 6  # capacity of the trains this line creates
+    _track_set: Set[int] = field(default_factory=set, init=False, repr=False, compare=False)
+    _cached_station_types: Optional[FrozenSet[StationType]] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
+        self.tracks = deque(self.tracks)
+        self._track_set = {pack_position(pos.x, pos.y) for pos in self.tracks}
         if self.tracks and not self.train:
-            self.train = Train(position=self.tracks[0])
+            self.train = Train(position=self.tracks[0], capacity=self.train_capacity)
     
     def add_track(self, position: Position) -> bool:
+        key = pack_position(position.x, position.y)
+        self._cached_station_types = None
         if not self.tracks:
             self.tracks.append(position)
-            self.train = Train(position=position)
+            self._track_set.add(key)
+            self.train = Train(position=position, capacity=self.train_capacity)
             return True
         
-        if position in self.tracks:
+        if key in self._track_set:
             return False
         
         if self.tracks[0].is_adjacent(position):
-            self.tracks.insert(0, position)
+            self.tracks.appendleft(position)
+            self._track_set.add(key)
+            if self.train:
+                self.train.track_idx += 1
             return True
         elif self.tracks[-1].is_adjacent(position):
             self.tracks.append(position)
+            self._track_set.add(key)
             return True
         
         return False
     
-    def get_station_types_on_line(self, grid: List[List[TileType]]) -> set:
-        station_types = set()
-        for pos in self.tracks:
-            tile_type = grid[pos.y][pos.x]
-            if tile_type != TileType.EMPTY:
-                station_types.add(StationType(tile_type.value))
-        return station_types
+    def get_station_types_on_line(self, grid: np.ndarray) -> FrozenSet[StationType]:
+        # Cached until the tracks change or a station spawns on one of them
+        if self._cached_station_types is None:
+            station_types = set()
+            for pos in self.tracks:
+                code = int(grid[pos.y, pos.x])
+                if code != TileType.EMPTY:
+                    station_types.add(StationType(code))
+            self._cached_station_types = frozenset(station_types)
+        return self._cached_station_types
+    
+    def invalidate_station_types(self):
+        self._cached_station_types = None
     
     def is_valid(self) -> bool:
         return len(self.tracks) >= 2
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class Action:
     action_type: Literal['create_line', 'extend_line', 'remove_line', 'none']
     from_pos: Optional[Position] = None
@@ -141,20 +191,28 @@ class Action:
     line_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GameState:
-    grid: List[List[TileType]]
+    grid: np.ndarray  # (grid_size, grid_size) int8 tile codes
     stations: List[Station]
     lines: List[Line]
     timestep: int = 0
     game_over: bool = False
     score: int = 0
+    _station_index: Dict[int, Station] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._station_index = {
+            pack_position(station.position.x, station.position.y): station
+            for station in self.stations
+        }
+    
+    def add_station(self, station: Station):
+        self.stations.append(station)
+        self._station_index[pack_position(station.position.x, station.position.y)] = station
     
     def get_station_at(self, position: Position) -> Optional[Station]:
-        for station in self.stations:
-            if station.position == position:
-                return station
-        return None
+        return self._station_index.get(pack_position(position.x, position.y))
     
     def get_line_by_id(self, line_id: int) -> Optional[Line]:
         for line in self.lines:
@@ -0,0 +1,387 @@
+import multiprocessing as mp
+from multiprocessing.connection import wait
+
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space, concatenate, create_empty_array
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .config import GameConfig, RewardConfig
+from .gym_env import MinimetroGymEnv, build_action_table, make_action_space, make_observation_space
+from .kernels import batch_pack_obs, make_batch_step, reset_env
+
+try:
+    from gymnasium.vector import AutoresetMode
+    _AUTORESET_METADATA = {"autoreset_mode": AutoresetMode.NEXT_STEP}
+except ImportError:  # gymnasium < 1.1 has no AutoresetMode; next-step was the default
+    _AUTORESET_METADATA = {}
+
+
+class MinimetroVectorEnv(gym.vector.VectorEnv):
+    """
+    Batched MinimetroRL environment.
+
+    Holds the state of num_envs games as arrays with a leading env axis and
+    steps all of them in one compiled kernel (parallel over envs when numba is
+    installed), instead of calling MinimetroGymEnv.step once per env.
+    Actions and observations use the same layout as MinimetroGymEnv.
+
+    Differences from wrapping MinimetroGymEnv in SyncVectorEnv:
+    - extend_line/remove_line always address lines by their current index,
+    - random draws come from one numpy Generator per vector env,
+    - finished envs reset on the following step (next-step autoreset).
+    """
+
+    metadata = {"render_modes": [], **_AUTORESET_METADATA}
+
+    def __init__(
+        self,
+        num_envs: int,
+        config: Optional[GameConfig] = None,
+        reward_config: Optional[RewardConfig] = None,
+        copy: bool = True,
+    ):
+        self.config = config or GameConfig()
+        self.reward_config = reward_config or RewardConfig()
+        self.num_envs = num_envs
+        self.copy = copy
+        self.render_mode = None
+
+        self.single_action_space = make_action_space(self.config)
+        self.action_space = spaces.MultiDiscrete(np.full(num_envs, self.single_action_space.n))
+        self.single_observation_space = make_observation_space(self.config)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        self._action_table = build_action_table(self.config.grid_size, self.config.max_lines)
+        self._batch_step = make_batch_step(self.config.grid_size, self.config.max_lines)
+
+        n = num_envs
+        grid_size = self.config.grid_size
+        n_cells = grid_size * grid_size
+        max_lines = self.config.max_lines
+        max_stations = self.config.max_stations
+
+        # Game state, one row per env
+        self._grid = np.zeros((n, n_cells), dtype=np.int8)
+        self._passengers = np.zeros((n, n_cells, 3), dtype=np.int32)
+        self._station_at = np.full((n, n_cells), -1, dtype=np.int16)
+        self._station_cells = np.zeros((n, max_stations), dtype=np.int32)
+        self._station_type = np.zeros((n, max_stations), dtype=np.int8)
+        self._n_stations = np.zeros(n, dtype=np.int32)
+        self._free_cells = np.zeros((n, n_cells), dtype=np.int32)
+        self._n_free = np.zeros(n, dtype=np.int32)
+        self._tracks = np.zeros((n, max_lines, n_cells), dtype=np.int32)
+        self._track_len = np.zeros((n, max_lines), dtype=np.int32)
+        self._n_lines = np.zeros(n, dtype=np.int32)
+        self._train_idx = np.zeros((n, max_lines), dtype=np.int32)
+        self._train_dir = np.ones((n, max_lines), dtype=np.int32)
+        self._train_cargo = np.zeros((n, max_lines, 3), dtype=np.int32)
+        self._line_types = np.zeros((n, max_lines, 3), dtype=np.bool_)
+        self._visited = np.zeros((n, max_lines), dtype=np.int16)
+        self._timestep = np.zeros(n, dtype=np.int32)
+        self._score = np.zeros(n, dtype=np.float32)
+        self._game_over = np.zeros(n, dtype=np.bool_)
+        self._overflow = np.zeros(n, dtype=np.bool_)
+        self._rewards = np.zeros(n, dtype=np.float64)
+        self._autoreset = np.zeros(n, dtype=np.bool_)
+
+        # Observation buffers; grid and passengers are flat per cell and
+        # exposed reshaped to the single-env layout
+        self._out_grid = np.zeros((n, n_cells), dtype=np.int32)
+        self._out_passengers = np.zeros((n, n_cells, 3), dtype=np.int32)
+        self._out_lines = np.zeros((n, max_lines, n_cells + 5), dtype=np.int32)
+        self._out_timestep = np.zeros(n, dtype=np.int32)
+        self._out_score = np.zeros(n, dtype=np.float32)
+        self._out_game_over = np.zeros(n, dtype=np.int32)
+        self._obs = {
+            "grid": self._out_grid.reshape(n, grid_size, grid_size),
+            "passengers": self._out_passengers.reshape(n, grid_size, grid_size, 3),
+            "lines": self._out_lines,
+            "timestep": self._out_timestep,
+            "score": self._out_score,
+            "game_over": self._out_game_over,
+        }
+
+        # torch views of the observation buffers, made on first obs_as_torch call
+        self._torch_obs: Optional[Dict[str, Any]] = None
+        self._torch_device_obs: Dict[Any, Dict[str, Any]] = {}
+
+        self.np_random = np.random.default_rng()
+        self.closed = False
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Reset every env."""
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+
+        for e in range(self.num_envs):
+            reset_env(e, self._grid, self._passengers, self._station_at, self._n_stations,
+                      self._free_cells, self._n_free, self._n_lines, self._timestep,
+                      self._score, self._game_over, self._overflow)
+        self._autoreset[:] = False
+
+        return self._observation(), {}
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Step every env with its action from the batch."""
+        actions = np.asarray(actions, dtype=np.int64)
+        config = self.config
+        reward_config = self.reward_config
+
+        # Pre-draw this step's randomness for all envs at once
+        cell_draw = self.np_random.random(self.num_envs)
+        type_draw = self.np_random.integers(0, 3, self.num_envs, dtype=np.int8)
+        dest_draw = self.np_random.integers(0, 2, (self.num_envs, config.max_stations), dtype=np.int8)
+
+        self._batch_step(
+            actions, self._autoreset, *self._action_table,
+            self._grid, self._passengers, self._station_at, self._station_cells,
+            self._station_type, self._n_stations, self._free_cells, self._n_free,
+            self._tracks, self._track_len, self._n_lines, self._train_idx, self._train_dir,
+            self._train_cargo, self._line_types, self._visited, self._timestep,
+            self._score, self._game_over, self._overflow,
+            cell_draw, type_draw, dest_draw,
+            config.max_stations, config.station_spawn_rate, config.passenger_spawn_rate,
+            config.station_capacity, config.train_capacity, config.max_timesteps,
+            float(reward_config.time_penalty), float(reward_config.passenger_delivered),
+            float(reward_config.game_over_penalty), self._rewards,
+        )
+
+        # The game only terminates; envs that just finished reset next step
+        terminated = self._game_over & ~self._autoreset
+        truncated = np.zeros(self.num_envs, dtype=np.bool_)
+        self._autoreset = terminated.copy()
+
+        rewards = self._rewards.copy() if self.copy else self._rewards
+        return self._observation(), rewards, terminated, truncated, {}
+
+    def sample_actions(self, horizon: Optional[int] = None) -> np.ndarray:
+        """Draw uniform random actions for every env in one call.
+
+        Returns shape (num_envs,), or (horizon, num_envs) to pre-draw a block
+        of steps. Draws come from action_space.np_random, so seeding the
+        action space makes them reproducible without touching the game's RNG.
+        """
+        shape = (self.num_envs,) if horizon is None else (horizon, self.num_envs)
+        return self.action_space.np_random.integers(
+            0, self.single_action_space.n, size=shape, dtype=np.int64
+        )
+
+    def obs_as_torch(self, device: Any = "cpu") -> Dict[str, Any]:
+        """Latest batched observation as torch tensors, without per-step allocation.
+
+        On the CPU the tensors share memory with the env's observation buffers
+        (whatever the copy flag), so they hold each new step without another
+        call. For any other device, each call copies the buffers into tensors
+        allocated there on the first call. Requires torch
+        (pip install minimetro-rl[torch]).
+        """
+        import torch
+
+        if self._torch_obs is None:
+            self._torch_obs = {key: torch.from_numpy(value) for key, value in self._obs.items()}
+        device = torch.device(device)
+        if device.type == "cpu":
+            return self._torch_obs
+
+        device_obs = self._torch_device_obs.get(device)
+        if device_obs is None:
+            device_obs = self._torch_device_obs[device] = {
+                key: torch.empty_like(value, device=device) for key, value in self._torch_obs.items()
+            }
+        for key, value in device_obs.items():
+            value.copy_(self._torch_obs[key], non_blocking=True)
+        return device_obs
+
+    def _observation(self) -> Dict[str, np.ndarray]:
+        batch_pack_obs(
+            self._grid, self._passengers, self._tracks, self._track_len, self._n_lines,
+            self._train_idx, self._train_cargo, self._timestep, self._score,
+            self._game_over, self._out_grid, self._out_passengers, self._out_lines,
+            self._out_timestep, self._out_score, self._out_game_over,
+        )
+        if self.copy:
+            return {key: value.copy() for key, value in self._obs.items()}
+        return self._obs
+
+    def close_extras(self, **kwargs: Any) -> None:
+        pass
+
+
+def _pool_worker(pipe, parent_pipe, config: GameConfig, reward_config: RewardConfig):
+    """Own one MinimetroGymEnv and serve reset/step requests from the pool."""
+    parent_pipe.close()
+    env = MinimetroGymEnv(config=config, reward_config=reward_config)
+    needs_reset = False
+    elapsed = 0
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == "reset" or (command == "step" and needs_reset):
+                # Like EnvPool, the step after an episode ends is a reset
+                obs, _ = env.reset(seed=data if command == "reset" else None)
+                needs_reset = False
+                elapsed = 0
+                pipe.send((obs, 0.0, False, False, elapsed))
+            elif command == "step":
+                obs, reward, terminated, truncated, _ = env.step(data)
+                needs_reset = terminated or truncated
+                elapsed += 1
+                pipe.send((obs, float(reward), terminated, truncated, elapsed))
+            elif command == "close":
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        env.close()
+        pipe.close()
+
+
+class MinimetroAsyncPool:
+    """
+    EnvPool-style asynchronous pool of MinimetroGymEnv worker processes.
+
+    With batch_size < num_envs, recv() returns as soon as batch_size envs have
+    a result, so a batch waits for the batch_size-th fastest env rather than
+    the slowest of all of them; the other envs keep stepping and are picked up
+    by later recv() calls. Each result carries info["env_id"] (send the next
+    actions to those ids) and info["elapsed_step"] (steps since that env's
+    last reset) so trajectories can be realigned per env.
+
+    Observations are batched into one preallocated buffer through gymnasium's
+    concatenate; with copy=False, recv() returns that buffer's arrays, which
+    the next recv() overwrites.
+
+    Workers start with the "spawn" method. context="fork" starts faster but
+    can deadlock once numba's parallel thread pool is running in the parent
+    (e.g. after stepping a MinimetroVectorEnv), so it is opt-in.
+
+    Usage:
+        pool.async_reset(seed)
+        while ...:
+            obs, reward, terminated, truncated, info = pool.recv()
+            pool.send(policy(obs), info["env_id"])
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        batch_size: int,
+        config: Optional[GameConfig] = None,
+        reward_config: Optional[RewardConfig] = None,
+        context: str = "spawn",
+        copy: bool = True,
+    ):
+        if not 0 < batch_size <= num_envs:
+            raise ValueError("batch_size must be between 1 and num_envs")
+        self.num_envs = num_envs
+        self.batch_size = batch_size
+        self.config = config or GameConfig()
+        self.reward_config = reward_config or RewardConfig()
+        self.copy = copy
+        self.single_action_space = make_action_space(self.config)
+        self.single_observation_space = make_observation_space(self.config)
+        self._batched_obs = create_empty_array(self.single_observation_space, n=batch_size, fn=np.zeros)
+
+        ctx = mp.get_context(context)
+        self._pipes = []
+        self._processes = []
+        for _ in range(num_envs):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_pool_worker,
+                args=(child_pipe, parent_pipe, self.config, self.reward_config),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+
+        self._env_of_pipe = {pipe: i for i, pipe in enumerate(self._pipes)}
+        self._pending: List[Any] = []
+        self.closed = False
+
+    def async_reset(self, seed: Optional[int] = None) -> None:
+        """Start resetting every env; results arrive through recv().
+
+        Step results still in flight are received and dropped first, so that
+        later recv() calls only return the reset observations.
+        """
+        for pipe in self._pending:
+            pipe.recv()
+        for i, pipe in enumerate(self._pipes):
+            pipe.send(("reset", None if seed is None else seed + i))
+        self._pending = list(self._pipes)
+
+    def send(self, actions: Sequence[int], env_ids: Sequence[int]) -> None:
+        """Start stepping the given envs with their actions."""
+        for action, env_id in zip(np.asarray(actions).tolist(), np.asarray(env_ids).tolist()):
+            pipe = self._pipes[env_id]
+            pipe.send(("step", action))
+            self._pending.append(pipe)
+
+    def recv(self) -> Tuple[Any, np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Wait for the first batch_size results among the pending envs."""
+        if len(self._pending) < self.batch_size:
+            raise RuntimeError("Fewer envs in flight than batch_size; call send() first")
+
+        ready: List[Any] = []
+        while len(ready) < self.batch_size:
+            waiting = [pipe for pipe in self._pending if pipe not in ready]
+            ready.extend(wait(waiting)[:self.batch_size - len(ready)])
+
+        env_ids = np.array([self._env_of_pipe[pipe] for pipe in ready], dtype=np.int32)
+        results = [pipe.recv() for pipe in ready]
+        for pipe in ready:
+            self._pending.remove(pipe)
+
+        observations, rewards, terminated, truncated, elapsed = zip(*results)
+        rewards = np.array(rewards, dtype=np.float64)
+        terminated = np.array(terminated, dtype=np.bool_)
+        truncated = np.array(truncated, dtype=np.bool_)
+        info = {"env_id": env_ids, "elapsed_step": np.array(elapsed, dtype=np.int64)}
+
+        obs = concatenate(self.single_observation_space, observations, self._batched_obs)
+        if self.copy:
+            obs = {key: value.copy() for key, value in obs.items()}
+        return obs, rewards, terminated, truncated, info
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        for pipe in self._pending:
+            pipe.recv()
+        for pipe in self._pipes:
+            pipe.send(("close", None))
+        for process in self._processes:
+            process.join()
+        for pipe in self._pipes:
+            pipe.close()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
+
+
+def make_minimetro_async_vec(
+    num_envs: int,
+    batch_size: Optional[int] = None,
+    config: Optional[GameConfig] = None,
+    reward_config: Optional[RewardConfig] = None,
+) -> MinimetroAsyncPool:
+    """Build a MinimetroAsyncPool returning batch_size of num_envs envs per recv().
+
+    batch_size defaults to num_envs, which waits for every env like a
+    synchronous vector env; smaller values skip waiting on stragglers.
+    """
+    return MinimetroAsyncPool(num_envs, batch_size or num_envs, config, reward_config)
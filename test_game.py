@@ -1,8 +1,11 @@
 import unittest
+
+import numpy as np
+
 from src.config import GameConfig, RewardConfig
 from src.environment import MinimetroEnvironment
 from src.game import MinimetroGame, SimpleAgent
-from src.types import Position, StationType, TileType, Action
+from src.types import Position, StationType, TileType, Action, STATION_INDEX
 
 
 class TestMinimetroEnvironment(unittest.TestCase):
@@ -57,6 +60,16 @@ class TestMinimetroEnvironment(unittest.TestCase):
         
         self.assertEqual(len(obs['lines']), 0)
     
+    def test_valid_action_ids_match_valid_actions(self):
+        self.env.reset()
+        self.env.engine.seed(0)
+        for _ in range(30):
+            valid = self.env.get_valid_actions()
+            ids_by_kind = self.env.get_valid_action_ids_by_kind()
+            decoded = [self.env.decode_action(i) for ids in ids_by_kind.values() for i in ids]
+            self.assertCountEqual(decoded, [a for a in valid if a['action'] != 'none'])
+            self.env.step(valid[self.env.engine.random.randrange(len(valid))])
+    
     def test_max_lines_limit(self):
         self.env.reset()
         
@@ -81,6 +94,15 @@ class TestGameTypes(unittest.TestCase):
         self.assertTrue(pos1.is_adjacent(pos2))
         self.assertFalse(pos1.is_adjacent(pos3))
     
+    def test_packed_adjacency(self):
+        from src.types import pack_position, packed_adjacent
+        
+        cells = [(1, 2), (2, 1), (0, 1), (1, 1), (2, 2), (1, 0), (3, 1)]
+        packed = np.array([pack_position(x, y) for x, y in cells], dtype=np.uint32)
+        mask = packed_adjacent(packed, pack_position(1, 1))
+        expected = [Position(*cell).is_adjacent(Position(1, 1)) for cell in cells]
+        self.assertEqual(mask.tolist(), expected)
+    
     def test_position_equality(self):
         pos1 = Position(1, 2)
         pos2 = Position(1, 2)
@@ -95,7 +117,7 @@ class TestGameTypes(unittest.TestCase):
         station = Station(Position(0, 0), StationType.CIRCLE)
         
         self.assertTrue(station.add_passenger(StationType.SQUARE))
-        self.assertEqual(station.passengers[StationType.SQUARE], 1)
+        self.assertEqual(station.passengers[STATION_INDEX[StationType.SQUARE]], 1)
         
         self.assertFalse(station.add_passenger(StationType.CIRCLE))
         
@@ -117,6 +139,83 @@ class TestGameTypes(unittest.TestCase):
         removed = train.remove_passengers(StationType.CIRCLE)
         self.assertEqual(removed, 6)
         self.assertEqual(len(train.passengers), 0)
+    
+    def test_train_remove_keeps_other_passengers(self):
+        from src.types import Train
+        
+        train = Train(Position(0, 0))
+        for passenger in (StationType.CIRCLE, StationType.SQUARE, StationType.CIRCLE, StationType.TRIANGLE):
+            train.add_passenger(passenger)
+        
+        self.assertEqual(train.remove_passengers(StationType.CIRCLE), 2)
+        self.assertEqual(train.passengers, [StationType.SQUARE, StationType.TRIANGLE])
+        self.assertEqual(train.remove_passengers(StationType.CIRCLE), 0)
+
+
+class TestGameEngine(unittest.TestCase):
+    def _play(self, use_jit, train_capacity=6):
+        from src.game_engine import GameEngine
+        
+        config = GameConfig(grid_size=5, max_timesteps=200, station_spawn_rate=3,
+                            passenger_spawn_rate=2, station_capacity=30,
+                            train_capacity=train_capacity)
+        engine = GameEngine(config)
+        engine._use_jit = use_jit
+        engine.seed(1234)
+        engine.reset()
+        
+        # Snake a single line through every cell so trains cross all stations
+        snake = [Position(x if y % 2 == 0 else 4 - x, y) for y in range(5) for x in range(5)]
+        actions = [Action('create_line', from_pos=snake[0], to_pos=snake[1])]
+        actions += [Action('extend_line', line_id=0, to_pos=pos) for pos in snake[2:]]
+        actions.append(Action('create_line', from_pos=Position(0, 1), to_pos=Position(0, 2)))
+        
+        history = []
+        for t in range(config.max_timesteps):
+            action = actions[t] if t < len(actions) else Action('none')
+            state, reward, done, info = engine.step(action)
+            history.append((
+                reward,
+                [station.passengers.tolist() for station in state.stations],
+                [(line.train.position.to_tuple(), line.train.direction,
+                  sorted(p.value for p in line.train.passengers)) for line in state.lines],
+            ))
+            if done:
+                break
+        return history
+    
+    def test_jit_tick_matches_python_tick(self):
+        self.assertEqual(self._play(use_jit=True), self._play(use_jit=False))
+    
+    def test_jit_tick_matches_python_tick_with_small_trains(self):
+        history = self._play(use_jit=False, train_capacity=2)
+        self.assertEqual(self._play(use_jit=True, train_capacity=2), history)
+        self.assertEqual(max(len(load) for _, _, lines in history for _, _, load in lines), 2)
+    
+    def test_station_overflow_ends_game(self):
+        from src.game_engine import GameEngine
+        
+        config = GameConfig(grid_size=5, max_timesteps=100, passenger_spawn_rate=1, station_capacity=3)
+        engine = GameEngine(config)
+        engine.reset()
+        
+        done = False
+        while not done:
+            state, reward, done, info = engine.step(Action('none'))
+        
+        self.assertLess(state.timestep, config.max_timesteps)
+        self.assertEqual(state.stations[0].total_passengers(), 3)
+    
+    def test_train_track_idx_follows_prepended_track(self):
+        from src.types import Line
+        
+        line = Line(line_id=0, tracks=[Position(1, 0), Position(2, 0)])
+        line.train.track_idx = 1
+        line.train.position = Position(2, 0)
+        
+        self.assertTrue(line.add_track(Position(0, 0)))
+        self.assertEqual(line.train.track_idx, 2)
+        self.assertEqual(line.tracks[line.train.track_idx], line.train.position)
 
 
 class TestGameConfig(unittest.TestCase):
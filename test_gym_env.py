@@ -3,16 +3,30 @@
 Test script for MinimetroRL Gymnasium environment.
 """
 
+import argparse
+
+import gymnasium as gym
 import numpy as np
+import pytest
 import sys
-import os
-
-# Add the current directory to the path for imports
-sys.path.insert(0, os.path.dirname(__file__))
 
 from src.gym_env import MinimetroGymEnv
+from src.vector_env import MinimetroVectorEnv, make_minimetro_async_vec
 from src.config import GameConfig, RewardConfig
 
+# Sub-envs for the AsyncVectorEnv rollout; set with --num-envs
+NUM_ENVS = 2
+
+
+def extend_action(env, slot, from_end, direction):
+    """Discrete id extending the line in list slot `slot` from its tail (from_end) or head."""
+    return env._action_reverse[('extend_line', slot, from_end, tuple(direction))]
+
+
+def remove_action(env, slot):
+    """Discrete id removing the line in list slot `slot`."""
+    return env._action_reverse[('remove_line', slot)]
+
 
 def test_basic_functionality():
     """Test basic environment functionality."""
@@ -63,10 +77,73 @@ def test_action_mapping():
             action_dict = env._convert_action(action)
             print(f"Action {action} -> {action_dict}")
     
+    # Every action that converts to something converts back to its own index
+    env.reset(seed=0)
+    env.env.step({'action': 'create_line', 'from': (0, 1), 'to': (1, 1)})
+    # Round trip once with line ids equal to slots, then with line 1 in slot 0
+    for step in ({'action': 'create_line', 'from': (2, 2), 'to': (2, 1)},
+                 {'action': 'remove_line', 'line_id': 0}):
+        env.env.step(step)
+        for action in range(env.action_space.n):
+            action_dict = env._convert_action(action)
+            if action_dict["action"] != "none":
+                assert env.action_index(action_dict) == action, (action, action_dict)
+    
     env.close()
     print("Action mapping test completed!\n")
 
 
+def test_no_obs():
+    """Steps inside no_obs() leave the observation dict untouched."""
+    print("Testing no_obs fast path...")
+    
+    env = MinimetroGymEnv(config=GameConfig(grid_size=5, max_timesteps=50))
+    obs, info = env.reset(seed=7)
+    
+    with env.no_obs():
+        for _ in range(5):
+            skipped, reward, terminated, truncated, info = env.step(0)
+            assert skipped is obs
+            assert obs['timestep'] == 0
+    
+    # The dict is refreshed on exit and converted again afterwards
+    assert obs['timestep'] == 5
+    obs, reward, terminated, truncated, info = env.step(0)
+    assert obs['timestep'] == 6
+    
+    # The engine's own observation dict is only built when someone reads it
+    assert env.env.engine._obs_stale
+    assert env.env.engine.obs['timestep'] == 6
+    
+    env.close()
+    print("no_obs test completed!\n")
+
+
+def test_flat_observation():
+    """flat_obs=True packs the dict observation into one vector."""
+    print("Testing flat observations...")
+    
+    config = GameConfig(grid_size=5, max_timesteps=50)
+    env = MinimetroGymEnv(config=config)
+    flat_env = MinimetroGymEnv(config=config, flat_obs=True)
+    obs, info = env.reset(seed=11)
+    flat, info = flat_env.reset(seed=11)
+    
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        action = env.action_index(env.env.get_valid_actions()[0] if rng.random() < 0.5
+                                  else {'action': 'none'})
+        obs, reward, terminated, truncated, info = env.step(action)
+        flat, reward, terminated, truncated, info = flat_env.step(action)
+        assert flat_env.observation_space.contains(flat)
+        expected = np.concatenate([np.ravel(value) for value in obs.values()])
+        assert np.array_equal(flat, expected)
+    
+    env.close()
+    flat_env.close()
+    print("Flat observation test completed!\n")
+
+
 def test_observation_conversion():
     """Test observation conversion."""
     print("Testing observation conversion...")
@@ -120,6 +197,259 @@ def test_random_episode():
     print("Random episode test completed!\n")
 
 
+def test_async_random_episodes():
+    """Run random episodes in worker processes through AsyncVectorEnv."""
+    print(f"Testing random episodes in {NUM_ENVS} async envs...")
+    
+    config = GameConfig(grid_size=6, max_timesteps=50)
+    # Spawned workers stay clear of numba's thread pool in this process;
+    # shared memory spares pickling the Dict observation every step
+    envs = gym.vector.AsyncVectorEnv(
+        [lambda: MinimetroGymEnv(config=config) for _ in range(NUM_ENVS)],
+        shared_memory=True,
+        context="spawn",
+    )
+    envs.action_space.seed(456)
+    
+    obs, info = envs.reset(seed=456)
+    assert obs['grid'].shape == (NUM_ENVS, 6, 6)
+    total_reward = 0.0
+    finished = np.zeros(NUM_ENVS, dtype=bool)
+    steps = 0
+    
+    # Envs autoreset on the step after they finish, so stop once every env
+    # has completed one episode
+    while not finished.all():
+        actions = envs.action_space.sample()
+        obs, rewards, terminated, truncated, info = envs.step(actions)
+        total_reward += rewards.sum()
+        finished |= terminated | truncated
+        steps += 1
+    
+    print(f"All episodes ended after {steps} steps")
+    print(f"Total reward: {total_reward}")
+    
+    envs.close()
+    print("Async random episodes test completed!\n")
+
+
+def test_vector_env():
+    """Step a batch of envs through the vectorized kernels."""
+    print("Testing vector environment...")
+    
+    config = GameConfig(grid_size=5, max_timesteps=20)
+    envs = MinimetroVectorEnv(num_envs=4, config=config)
+    
+    obs, info = envs.reset(seed=789)
+    assert obs['grid'].shape == (4, 5, 5)
+    assert obs['passengers'].shape == (4, 5, 5, 3)
+    assert obs['lines'].shape == (4, config.max_lines, 25 + 5)
+    assert envs.observation_space.contains(obs)
+    
+    # Create line (0,0)-(1,0) in every env, then extend its tail to the right
+    env = MinimetroGymEnv(config=config)
+    create = env.action_index({'action': 'create_line', 'from': (0, 0), 'to': (1, 0)})
+    extend = extend_action(env, 0, True, (1, 0))
+    env.close()
+    
+    obs, rewards, terminated, truncated, info = envs.step(np.full(4, create))
+    obs, rewards, terminated, truncated, info = envs.step(np.full(4, extend))
+    assert rewards.shape == (4,)
+    assert (obs['lines'][:, 0, :3] == [0, 1, 2]).all()
+    assert (obs['lines'][:, 1:, :25] == 0).all()
+    
+    envs.action_space.seed(789)
+    actions = envs.sample_actions(config.max_timesteps)
+    assert actions.shape == (config.max_timesteps, 4)
+    assert all(envs.action_space.contains(a) for a in actions)
+    
+    steps = 2
+    while not terminated.any():
+        obs, rewards, terminated, truncated, info = envs.step(actions[steps])
+        steps += 1
+        assert envs.observation_space.contains(obs)
+    assert steps <= config.max_timesteps
+    
+    # Finished envs come back reset on the next step
+    done = terminated
+    obs, rewards, terminated, truncated, info = envs.step(np.zeros(4, dtype=np.int64))
+    assert (obs['timestep'][done] == 0).all()
+    assert (rewards[done] == 0).all()
+    
+    envs.close()
+    print("Vector environment test completed!\n")
+
+
+def test_vector_env_torch():
+    """obs_as_torch mirrors the numpy observation buffers."""
+    torch = pytest.importorskip("torch")
+    print("Testing torch observations...")
+    
+    config = GameConfig(grid_size=5, max_timesteps=20)
+    envs = MinimetroVectorEnv(num_envs=4, config=config)
+    envs.reset(seed=789)
+    env = MinimetroGymEnv(config=config)
+    create = env.action_index({'action': 'create_line', 'from': (0, 0), 'to': (1, 0)})
+    env.close()
+    
+    obs, rewards, terminated, truncated, info = envs.step(np.full(4, create))
+    tensors = envs.obs_as_torch()
+    assert tensors.keys() == obs.keys()
+    for key, value in obs.items():
+        assert tensors[key].dtype == getattr(torch, value.dtype.name)
+        assert tuple(tensors[key].shape) == value.shape
+        assert (tensors[key].numpy() == value).all()
+    
+    # CPU tensors share the env buffers, so they follow later steps
+    obs, rewards, terminated, truncated, info = envs.step(np.zeros(4, dtype=np.int64))
+    for key, value in obs.items():
+        assert (tensors[key].numpy() == value).all()
+    
+    envs.close()
+    print("Torch observation test completed!\n")
+
+
+def test_vector_env_matches_single_env():
+    """A scripted episode gives the same observations in both env types.
+    
+    Stations are disabled so that nothing depends on the random draws.
+    """
+    print("Testing vector env against the single env...")
+    
+    config = GameConfig(grid_size=5, max_timesteps=12, max_stations=0)
+    env = MinimetroGymEnv(config=config)
+    envs = MinimetroVectorEnv(num_envs=1, config=config)
+    
+    # Removing line 0 moves the later lines down a slot, so the extends after
+    # it address lines whose slot and id differ
+    actions = [
+        env.action_index({'action': 'create_line', 'from': (0, 0), 'to': (1, 0)}),
+        extend_action(env, 0, True, (1, 0)),
+        env.action_index({'action': 'create_line', 'from': (3, 3), 'to': (3, 4)}),
+        extend_action(env, 1, False, (0, -1)),
+        extend_action(env, 0, False, (0, 1)),
+        remove_action(env, 0),
+        env.action_index({'action': 'create_line', 'from': (0, 4), 'to': (1, 4)}),
+        extend_action(env, 1, True, (1, 0)),
+        extend_action(env, 0, True, (1, 0)),
+        remove_action(env, 1),
+        extend_action(env, 0, False, (0, -1)),
+        0,
+    ]
+    
+    obs, info = env.reset(seed=0)
+    vec_obs, info = envs.reset(seed=0)
+    for action in actions:
+        for key in obs:
+            assert np.array_equal(vec_obs[key][0], obs[key]), key
+        obs, reward, terminated, truncated, info = env.step(action)
+        vec_obs, rewards, vec_terminated, vec_truncated, info = envs.step(np.array([action]))
+        assert rewards[0] == reward and vec_terminated[0] == terminated
+    assert terminated
+    lines = env.env.engine.state.lines
+    assert [line.line_id for line in lines] == [1]
+    assert [pos.to_tuple() for pos in lines[0].tracks] == [(3, 1), (3, 2), (3, 3), (3, 4), (4, 4)]
+    
+    env.close()
+    envs.close()
+    print("Vector env comparison test completed!\n")
+
+
+def test_async_pool():
+    """Collect partial batches from an async pool of env processes."""
+    print("Testing async env pool...")
+    
+    config = GameConfig(grid_size=5, max_timesteps=10)
+    pool = make_minimetro_async_vec(num_envs=4, batch_size=2, config=config)
+    pool.async_reset(seed=0)
+    
+    # Build line (0,0)-(1,0)-(2,0) at the start of every episode
+    env = MinimetroGymEnv(config=config)
+    create = env.action_index({'action': 'create_line', 'from': (0, 0), 'to': (1, 0)})
+    extend = extend_action(env, 0, True, (1, 0))
+    env.close()
+    scripted = {0: create, 1: extend}
+    
+    seen = set()
+    extended = 0
+    for _ in range(40):
+        obs, rewards, terminated, truncated, info = pool.recv()
+        env_ids = info["env_id"]
+        elapsed = info["elapsed_step"]
+        assert len(env_ids) == 2 and len(set(env_ids.tolist())) == 2
+        assert obs["grid"].shape == (2, 5, 5)
+        assert (elapsed <= config.max_timesteps).all()
+        # Steps since reset line up with the env's own timestep
+        assert (obs["timestep"] == elapsed).all()
+        for lines, steps in zip(obs["lines"], elapsed.tolist()):
+            if steps >= 2:
+                assert lines[0, :3].tolist() == [0, 1, 2]
+                extended += 1
+        seen.update(env_ids.tolist())
+        pool.send([scripted.get(steps, 0) for steps in elapsed.tolist()], env_ids)
+    
+    assert seen == {0, 1, 2, 3}
+    assert extended > 0
+    
+    # Resetting with steps still in flight drops their results
+    pool.async_reset(seed=1)
+    for _ in range(2):
+        obs, rewards, terminated, truncated, info = pool.recv()
+        assert (info["elapsed_step"] == 0).all() and (obs["timestep"] == 0).all()
+    pool.close()
+    print("Async env pool test completed!\n")
+
+
+def test_jax_env():
+    """Run the functional JAX env under jit and vmap."""
+    print("Testing JAX environment...")
+    
+    try:
+        import jax
+    except ImportError:
+        print("jax not installed, skipping JAX environment test\n")
+        return
+    from src.jax_env import MinimetroJax
+    
+    config = GameConfig(grid_size=5, max_timesteps=20)
+    env = MinimetroJax(config=config)
+    params = env.default_params
+    space = MinimetroGymEnv(config=config).observation_space
+    
+    obs, state = env.reset(jax.random.PRNGKey(0), params)
+    assert space.contains({key: np.asarray(value) for key, value in obs.items()})
+    
+    # Same create/extend sequence as the vector env test
+    gym_env = MinimetroGymEnv(config=config)
+    create = gym_env.action_index({'action': 'create_line', 'from': (0, 0), 'to': (1, 0)})
+    extend = extend_action(gym_env, 0, True, (1, 0))
+    
+    step = jax.jit(env.step)
+    obs, state, reward, done, info = step(jax.random.PRNGKey(1), state, create, params)
+    obs, state, reward, done, info = step(jax.random.PRNGKey(2), state, extend, params)
+    assert np.asarray(obs['lines'])[0, :3].tolist() == [0, 1, 2]
+    assert space.contains({key: np.asarray(value) for key, value in obs.items()})
+    
+    # Indices past the action table are 'none', as in MinimetroGymEnv, even
+    # with every line slot in use
+    for key, row in enumerate((2, 4)):
+        action = gym_env.action_index({'action': 'create_line', 'from': (0, row), 'to': (1, row)})
+        obs, state, reward, done, info = step(jax.random.PRNGKey(10 + key), state, action, params)
+    assert int(state.n_lines) == config.max_lines
+    obs, state, reward, done, info = step(jax.random.PRNGKey(3), state, env.action_space_n - 1, params)
+    assert int(state.n_lines) == config.max_lines
+    gym_env.close()
+    
+    rollout = jax.jit(env.random_rollout, static_argnums=(1, 2))
+    state, rewards, dones = rollout(jax.random.PRNGKey(3), 8, 2 * config.max_timesteps, params)
+    assert rewards.shape == (2 * config.max_timesteps, 8)
+    # Every env finishes at least once and is reset in place
+    assert np.asarray(dones).any(axis=0).all()
+    assert (np.asarray(state.timestep) < config.max_timesteps).all()
+    
+    print("JAX environment test completed!\n")
+
+
 def main():
     """Run all tests."""
     print("=== MinimetroRL Gymnasium Environment Tests ===\n")
@@ -127,8 +457,19 @@ def main():
     try:
         test_basic_functionality()
         test_action_mapping()
+        test_no_obs()
+        test_flat_observation()
         test_observation_conversion()
         test_random_episode()
+        test_async_random_episodes()
+        test_vector_env()
+        try:
+            test_vector_env_torch()
+        except pytest.skip.Exception as e:
+            print(f"Skipping torch observation test: {e}\n")
+        test_vector_env_matches_single_env()
+        test_async_pool()
+        test_jax_env()
         
         print("=== All tests completed successfully! ===")
         
@@ -142,4 +483,8 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-envs", type=int, default=NUM_ENVS,
+                        help="sub-envs in the AsyncVectorEnv rollout")
+    NUM_ENVS = parser.parse_args().num_envs
+    sys.exit(main())
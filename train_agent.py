@@ -1,9 +1,3 @@
-import sys
-import os
-
-# Add the current directory to the path for imports
-sys.path.insert(0, os.path.dirname(__file__))
-
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import CheckpointCallback
 